@@ -1,76 +1,123 @@
 import sys
 import os
 import uuid
+import asyncio
 import logging
+import string
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 # Add the project root to Python path for imports
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from healer.config import config
-from healer.log_parser import LogParser
+from healer.log_parser import DEFAULT_PARSER, read_log_tail
 from healer.llm_client import LLMClient
 from healer.git_ops import GitOps
 
 # Setup logging
 logger = config.setup_logging()
 
+# CI failures are reported at the end of the log, so parsing starts with this
+# much of its tail and only widens the window when nothing is found there.
+LOG_TAIL_BYTES = 1 << 20
+
+# How long the regex parser may run before LLM analysis is started alongside it
+PARSER_HEAD_START = 0.5
+
+PR_BODY_TEMPLATE = string.Template("""## 🔧 Automated Fix Summary
+
+**Error Type**: $error_type
+**File**: `$file_path`
+**Line**: $line_number
+**Framework**: $framework
+
+### 🐛 Original Error
+```
+$error_message
+```
+
+### 🤖 AI Analysis
+This error was automatically detected and fixed by the AI Healer Agent. The fix addresses the specific issue while preserving existing functionality.
+
+### 🧪 Testing
+Please verify that:
+- [ ] All existing tests still pass
+- [ ] The specific failing test now passes
+- [ ] No new regressions are introduced
+
+### 📊 Healing Session
+- **Session ID**: `$session_id`
+- **Agent Version**: `1.0.0`
+- **Model Used**: `$model`
+""")
+
 class HealerAgent:
     """Main AI Healer Agent with comprehensive error handling and recovery"""
     
     def __init__(self):
-        self.parser = LogParser()
+        self.parser = DEFAULT_PARSER
         self.llm_client = None
         self.git_ops = None
         self.healing_session_id = uuid.uuid4().hex[:8]
         
-        logger.info(f"Initializing Healer Agent (Session: {self.healing_session_id})")
+        logger.info("Initializing Healer Agent (Session: %s)", self.healing_session_id)
         
-    def initialize_clients(self):
-        """Initialize LLM and Git clients with error handling"""
+    def initialize_clients(self, llm_client: Optional[LLMClient] = None):
+        """Initialize LLM and Git clients with error handling; heals running
+        together pass one shared llm_client"""
         try:
-            self.llm_client = LLMClient()
+            self.llm_client = llm_client or LLMClient()
             logger.info("LLM client initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize LLM client: {e}")
+            logger.error("Failed to initialize LLM client: %s", e)
             raise
         
         try:
             self.git_ops = GitOps()
             logger.info("Git operations client initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize Git client: {e}")
+            logger.error("Failed to initialize Git client: %s", e)
             raise
 
-    def heal(self, log_file_path: str) -> bool:
+    async def heal(self, log_file_path: str) -> bool:
         """Main healing process with comprehensive error handling"""
-        logger.info(f"Starting healing process for: {log_file_path}")
+        logger.info("Starting healing process for: %s", log_file_path)
         
+        # Fetch the base branch the fix branch will start from while the log
+        # is parsed; cancelled if there turns out to be nothing to fix
+        fetch = asyncio.create_task(self.git_ops.fetch_base())
+        warm_up = None
         try:
-            # Step 1: Read and validate log file
-            log_content = self._read_log_file(log_file_path)
-            if not log_content:
-                return False
-            
-            # Step 2: Parse the log to find errors
-            error_info = self._parse_log_content(log_content)
+            # Step 1 & 2: Read the end of the log and parse it to find errors
+            error_info = await self._parse_log_file(log_file_path)
             if not error_info:
                 return False
             
-            # Step 3: Read and validate the failing file
-            file_content = self._read_failing_file(error_info['file_path'])
+            # There is something to fix: connect to the LLM API while the
+            # failing file is read, so the first request skips the handshakes
+            warm_up = asyncio.create_task(self.llm_client.warm_up())
+            
+            # Step 3: Read and validate the failing file at the fetched base commit
+            if not await fetch:
+                return False
+            file_content = await self._read_failing_file(error_info['file_path'])
             if not file_content:
                 return False
             
             # Step 4: Get fix from LLM
-            fixed_content = self._get_ai_fix(file_content, error_info)
+            fixed_content = await self._get_ai_fix(file_content, error_info)
             if not fixed_content:
                 return False
             
-            # Step 5: Apply fix and create PR
-            success = self._apply_fix_and_create_pr(error_info, fixed_content)
+            # Step 5: Apply and push the fix (one heal at a time per working tree)
+            async with self.git_ops.worktree_lock:
+                branch_name = await self._apply_and_push_fix(error_info, fixed_content)
+            
+            # Step 6: Open the PR; it only needs the pushed branch, so other
+            # heals can use the working tree while this request is in flight
+            success = bool(branch_name) and await self._create_pull_request(branch_name, error_info)
             
             if success:
                 logger.info("🎉 Healing process completed successfully!")
@@ -82,94 +129,147 @@ class HealerAgent:
             return success
             
         except Exception as e:
-            logger.error(f"Unexpected error during healing: {e}")
+            logger.error("Unexpected error during healing: %s", e)
             self._log_healing_summary({}, success=False, error=str(e))
             return False
+        finally:
+            if warm_up:
+                warm_up.cancel()
+            if not fetch.done():
+                fetch.cancel()
+                await asyncio.gather(fetch, return_exceptions=True)
 
-    def _read_log_file(self, log_file_path: str) -> Optional[str]:
-        """Read and validate log file"""
+    async def _parse_log_file(self, log_file_path: str) -> Optional[Dict[str, Any]]:
+        """Parse the log from its end, hedging slow parses with an LLM analysis.
+
+        The regex parser normally answers within milliseconds. If it is still
+        running after PARSER_HEAD_START seconds, LLM analysis of the log tail
+        starts alongside it so a parser miss no longer costs parser time plus
+        LLM time; a parser hit still wins and the LLM request is cancelled.
+        """
+        window = await self._read_log_file(log_file_path, LOG_TAIL_BYTES)
+        if not window:
+            return None
+        
+        tail, whole_file = window
+        parse_task = asyncio.create_task(self._parse_log_windows(log_file_path, tail, whole_file))
+        llm_task = None
+        
         try:
-            if not os.path.exists(log_file_path):
-                logger.error(f"Log file not found: {log_file_path}")
-                return None
+            done, _ = await asyncio.wait({parse_task}, timeout=PARSER_HEAD_START)
+            if not done and self.llm_client:
+                logger.info("Log parser still running, starting LLM analysis speculatively")
+                llm_task = asyncio.create_task(self._analyze_with_llm(tail))
             
-            with open(log_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            error_info = await parse_task
             
-            if not content.strip():
-                logger.error("Log file is empty")
-                return None
+            # Only the tail is handed to the LLM, never a whole huge log
+            if not error_info and self.llm_client:
+                logger.info("Falling back to LLM-based log analysis")
+                error_info = await (llm_task or self._analyze_with_llm(tail))
             
-            logger.info(f"Successfully read log file: {len(content)} characters")
-            return content
+            return self._validate_error_info(error_info)
             
         except Exception as e:
-            logger.error(f"Failed to read log file {log_file_path}: {e}")
+            logger.error("Failed to parse log file %s: %s", log_file_path, e)
             return None
+        finally:
+            if llm_task and not llm_task.done():
+                llm_task.cancel()
 
-    def _parse_log_content(self, log_content: str) -> Optional[Dict[str, Any]]:
-        """Parse log content to extract error information"""
-        try:
-            # First try the enhanced log parser
-            error_info = self.parser.parse_failure(log_content)
-            
-            # If that fails, try LLM-based analysis
-            if not error_info and self.llm_client:
-                logger.info("Falling back to LLM-based log analysis")
-                error_info = self.llm_client.analyze_error(log_content)
-            
-            if not error_info:
-                logger.error("No parseable error found in logs")
-                return None
-            
-            # Validate error info
-            required_fields = ['file_path', 'error_message']
-            missing_fields = [field for field in required_fields if not error_info.get(field)]
-            
-            if missing_fields:
-                logger.error(f"Incomplete error info, missing: {missing_fields}")
+    async def _parse_log_windows(self, log_file_path: str, log_content: str, whole_file: bool) -> Optional[Dict[str, Any]]:
+        """Run the parser over the log tail, doubling the window until an error is found"""
+        max_bytes = LOG_TAIL_BYTES
+        
+        while True:
+            error_info = await asyncio.to_thread(self.parser.parse_failure, log_content)
+            if error_info or whole_file:
+                return error_info
+            
+            max_bytes *= 2
+            logger.info("No error in log tail, widening window to %s bytes", max_bytes)
+            window = await self._read_log_file(log_file_path, max_bytes)
+            if not window:
                 return None
-            
-            logger.info(f"Found error in {error_info['file_path']}: {error_info['error_message']}")
-            return error_info
-            
-        except Exception as e:
-            logger.error(f"Failed to parse log content: {e}")
+            log_content, whole_file = window
+
+    async def _analyze_with_llm(self, log_content: str) -> Optional[Dict[str, Any]]:
+        """LLM-based log analysis with the async client"""
+        return await self.llm_client.analyze_error(log_content)
+
+    def _read_log_tail(self, log_file_path: str, max_bytes: int) -> Tuple[str, bool]:
+        """Read at most the last max_bytes of a file; also report whether that is all of it"""
+        with open(log_file_path, 'rb') as f:
+            return read_log_tail(f, max_bytes)
+
+    async def _read_log_file(self, log_file_path: str, max_bytes: int) -> Optional[Tuple[str, bool]]:
+        """Read and validate the tail of the log file"""
+        try:
+            content, whole_file = await asyncio.to_thread(self._read_log_tail, log_file_path, max_bytes)
+        except FileNotFoundError:
+            logger.error("Log file not found: %s", log_file_path)
+            return None
+        except OSError as e:
+            logger.error("Failed to read log file %s: %s", log_file_path, e)
+            return None
+        
+        if not content.strip():
+            logger.error("Log file is empty")
+            return None
+        
+        logger.info("Successfully read log file: %s characters", len(content))
+        return content, whole_file
+
+    def _validate_error_info(self, error_info: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Validate the error information found in the log"""
+        if not error_info:
+            logger.error("No parseable error found in logs")
+            return None
+        
+        # Validate error info
+        required_fields = ['file_path', 'error_message']
+        missing_fields = [field for field in required_fields if not error_info.get(field)]
+        
+        if missing_fields:
+            logger.error("Incomplete error info, missing: %s", missing_fields)
             return None
+        
+        logger.info("Found error in %s: %s", error_info['file_path'], error_info['error_message'])
+        return error_info
 
-    def _read_failing_file(self, file_path: str) -> Optional[str]:
+    async def _read_failing_file(self, file_path: str) -> Optional[str]:
         """Read and validate the failing file"""
         try:
-            if not os.path.exists(file_path):
-                logger.error(f"Failing file not found: {file_path}")
-                return None
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            if not content.strip():
-                logger.error(f"Failing file is empty: {file_path}")
-                return None
-            
-            logger.info(f"Successfully read failing file: {file_path}")
-            return content
-            
-        except Exception as e:
-            logger.error(f"Failed to read failing file {file_path}: {e}")
+            # Read at the base commit rather than from the working tree, which
+            # other heals share. Decoded strictly: this file is rewritten with
+            # the fix, so replacement characters would corrupt it.
+            content = (await self.git_ops.read_base_file(file_path)).decode('utf-8')
+        except FileNotFoundError:
+            logger.error("Failing file not found: %s", file_path)
+            return None
+        except (OSError, UnicodeDecodeError, asyncio.TimeoutError) as e:
+            logger.error("Failed to read failing file %s: %s", file_path, e)
+            return None
+        
+        if not content.strip():
+            logger.error("Failing file is empty: %s", file_path)
             return None
+        
+        logger.info("Successfully read failing file: %s", file_path)
+        return content
 
-    def _get_ai_fix(self, file_content: str, error_info: Dict[str, Any]) -> Optional[str]:
+    async def _get_ai_fix(self, file_content: str, error_info: Dict[str, Any]) -> Optional[str]:
         """Get AI-generated fix for the failing code"""
         try:
             logger.info("Requesting AI fix...")
-            fixed_content = self.llm_client.get_fix(file_content, error_info)
+            fixed_content = await self.llm_client.get_fix(file_content, error_info)
             
             if not fixed_content or fixed_content == file_content:
                 logger.error("LLM returned empty or unchanged content")
                 return None
             
             # Basic validation of the fixed content
-            if len(fixed_content.split('\n')) < 2:
+            if fixed_content.count('\n') < 1:
                 logger.error("LLM returned suspiciously short content")
                 return None
             
@@ -177,85 +277,74 @@ class HealerAgent:
             return fixed_content
             
         except Exception as e:
-            logger.error(f"Failed to get AI fix: {e}")
+            logger.error("Failed to get AI fix: %s", e)
             return None
 
-    def _apply_fix_and_create_pr(self, error_info: Dict[str, Any], fixed_content: str) -> bool:
-        """Apply the fix and create a pull request"""
+    async def _apply_and_push_fix(self, error_info: Dict[str, Any], fixed_content: str) -> Optional[str]:
+        """Apply the fix on a new branch and push it, returning the branch name"""
         branch_name = f"{config.branch_prefix}-{self.healing_session_id}"
         
         try:
             # Create branch
-            if not self.git_ops.create_branch(branch_name):
-                return False
+            if not await self.git_ops.create_branch(branch_name):
+                return None
             
             # Apply fix
-            logger.info(f"Applying fix to {error_info['file_path']}")
-            with open(error_info['file_path'], 'w', encoding='utf-8') as f:
-                f.write(fixed_content)
+            logger.info("Applying fix to %s", error_info['file_path'])
+            await asyncio.to_thread(Path(error_info['file_path']).write_text, fixed_content, encoding='utf-8')
             
             # Commit changes
             commit_message = f"fix: AI repair for {error_info['error_message'][:50]}..."
-            if not self.git_ops.commit_changes(error_info['file_path'], commit_message):
-                return False
+            if not await self.git_ops.commit_changes(error_info['file_path'], commit_message):
+                return None
             
             # Push changes
-            if not self.git_ops.push_changes(branch_name):
-                return False
-            
-            # Create PR
-            pr_title = f"🤖 AI Fix: {error_info.get('error_type', 'Error').title()} in {os.path.basename(error_info['file_path'])}"
-            pr_body = self._create_pr_body(error_info)
-            
-            pr_url = self.git_ops.create_pr(branch_name, pr_title, pr_body)
+            if not await self.git_ops.push_changes(branch_name):
+                return None
             
-            if pr_url:
-                logger.info(f"Pull request created: {pr_url}")
-                return True
-            else:
-                logger.error("Failed to create pull request")
-                return False
+            return branch_name
                 
         except Exception as e:
-            logger.error(f"Failed to apply fix and create PR: {e}")
+            logger.error("Failed to apply fix and create PR: %s", e)
             # Attempt cleanup
             try:
-                self.git_ops.cleanup_branch(branch_name)
+                await self.git_ops.cleanup_branch(branch_name)
             except:
                 pass
+            return None
+
+    async def _create_pull_request(self, branch_name: str, error_info: Dict[str, Any]) -> bool:
+        """Open a pull request for a pushed fix branch"""
+        pr_title = f"🤖 AI Fix: {error_info.get('error_type', 'Error').title()} in {os.path.basename(error_info['file_path'])}"
+        pr_body = self._create_pr_body(error_info)
+        
+        pr_url = await self.git_ops.create_pr(branch_name, pr_title, pr_body)
+        
+        if pr_url:
+            logger.info("Pull request created: %s", pr_url)
+            return True
+        else:
+            logger.error("Failed to create pull request")
             return False
 
     def _create_pr_body(self, error_info: Dict[str, Any]) -> str:
         """Create a comprehensive PR body"""
-        return f"""## 🔧 Automated Fix Summary
-
-**Error Type**: {error_info.get('error_type', 'Unknown')}
-**File**: `{error_info['file_path']}`
-**Line**: {error_info.get('line_number', 'Unknown')}
-**Framework**: {error_info.get('framework', 'Unknown')}
-
-### 🐛 Original Error
-```
-{error_info['error_message']}
-```
-
-### 🤖 AI Analysis
-This error was automatically detected and fixed by the AI Healer Agent. The fix addresses the specific issue while preserving existing functionality.
-
-### 🧪 Testing
-Please verify that:
-- [ ] All existing tests still pass
-- [ ] The specific failing test now passes
-- [ ] No new regressions are introduced
-
-### 📊 Healing Session
-- **Session ID**: `{self.healing_session_id}`
-- **Agent Version**: `1.0.0`
-- **Model Used**: `{config.openai_model}`
-"""
+        return PR_BODY_TEMPLATE.substitute(
+            error_type=error_info.get('error_type', 'Unknown'),
+            file_path=error_info['file_path'],
+            line_number=error_info.get('line_number', 'Unknown'),
+            framework=error_info.get('framework', 'Unknown'),
+            error_message=error_info['error_message'],
+            session_id=self.healing_session_id,
+            model=config.openai_model
+        )
 
     def _log_healing_summary(self, error_info: Dict[str, Any], success: bool, error: str = None):
         """Log a summary of the healing session"""
+        level = logging.INFO if success else logging.ERROR
+        if not logger.isEnabledFor(level):
+            return
+        
         summary = {
             'session_id': self.healing_session_id,
             'success': success,
@@ -266,11 +355,39 @@ Please verify that:
         
         if error:
             summary['error'] = error
+        if self.llm_client:
+            summary['llm_cache'] = self.llm_client.cache_stats()
         
         if success:
-            logger.info(f"Healing Summary: {summary}")
+            logger.info("Healing Summary: %s", summary)
         else:
-            logger.error(f"Healing Failed: {summary}")
+            logger.error("Healing Failed: %s", summary)
+
+async def async_main(log_path: str) -> bool:
+    """Heal a single log file, or every *.log file in a directory concurrently"""
+    path = Path(log_path)
+    log_files = sorted(str(p) for p in path.glob('*.log')) if path.is_dir() else [log_path]
+    
+    if not log_files:
+        logger.error("No log files found in: %s", log_path)
+        return False
+    
+    healers = []
+    llm_client = None
+    try:
+        # One LLM client for every heal: its connection pool, sized to
+        # MAX_CONCURRENCY, caps the OpenAI requests in flight across heals
+        llm_client = LLMClient()
+        for _ in log_files:
+            healer = HealerAgent()
+            healers.append(healer)
+            healer.initialize_clients(llm_client)
+        
+        results = await asyncio.gather(*(healer.heal(log_file) for healer, log_file in zip(healers, log_files)))
+    finally:
+        await asyncio.gather(*(healer.git_ops.close() for healer in healers if healer.git_ops),
+                             *([llm_client.close()] if llm_client else []))
+    return all(results)
 
 def main():
     """Main entry point for the healer agent"""
@@ -279,18 +396,15 @@ def main():
     
     # Validate arguments
     if len(sys.argv) < 2:
-        print("❌ Usage: python agent.py <path_to_log_file>")
+        print("❌ Usage: python agent.py <path_to_log_file_or_directory>")
         print("Example: python agent.py test_output.log")
         sys.exit(1)
     
     log_file_path = sys.argv[1]
     
     try:
-        # Initialize and run healer
-        healer = HealerAgent()
-        healer.initialize_clients()
-        
-        success = healer.heal(log_file_path)
+        # Initialize and run healer(s)
+        success = asyncio.run(async_main(log_file_path))
         
         if success:
             print("✅ Healing completed successfully!")
@@ -304,7 +418,7 @@ def main():
         print("\n⚠️  Healing process interrupted")
         sys.exit(1)
     except Exception as e:
-        logger.error(f"Fatal error: {e}")
+        logger.error("Fatal error: %s", e)
         print(f"💥 Fatal error: {e}")
         sys.exit(1)
 
@@ -0,0 +1,125 @@
+"""
+Local cache of LLM responses so repeat failures skip the API round trip
+"""
+import hashlib
+import logging
+import math
+import sqlite3
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_THRESHOLD = 0.95
+
+class FixCache:
+    """SQLite-backed exact-match cache with an optional embedding-similarity tier"""
+
+    def __init__(self, path: str, ttl: int):
+        self.ttl = ttl
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+        if path != ':memory:':
+            path = str(Path(path).expanduser())
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fixes ("
+            "key BLOB PRIMARY KEY, fixed TEXT, embedding BLOB, "
+            "file_hash BLOB, created_at REAL)"
+        )
+        self._conn.execute("DELETE FROM fixes WHERE created_at < ?", (time.time() - self.ttl,))
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(*parts: str) -> bytes:
+        """Hash the given parts into a fixed-size cache key"""
+        return hashlib.blake2b(b"\0".join(p.encode() for p in parts), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        """Return the cached response for an exact key, if still fresh"""
+        try:
+            row = self._conn.execute(
+                "SELECT fixed FROM fixes WHERE key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache lookup failed: {e}")
+            return None
+        
+        if row:
+            self.hits += 1
+            return row[0]
+        self.misses += 1
+        return None
+
+    def get_similar(self, file_hash: bytes, embedding: Sequence[float]) -> Optional[str]:
+        """Return a cached fix for the same file content whose error embedding is close enough"""
+        query = _normalize(embedding)
+        best_score, best_fixed = 0.0, None
+
+        try:
+            rows = self._conn.execute(
+                "SELECT fixed, embedding FROM fixes "
+                "WHERE file_hash = ? AND embedding IS NOT NULL AND created_at >= ?",
+                (file_hash, time.time() - self.ttl)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache lookup failed: {e}")
+            return None
+
+        for fixed, blob in rows:
+            stored = array('f')
+            stored.frombytes(blob)
+            if len(stored) != len(query):
+                continue
+            score = math.fsum(a * b for a, b in zip(query, stored))
+            if score > best_score:
+                best_score, best_fixed = score, fixed
+
+        if best_score >= SEMANTIC_THRESHOLD:
+            logger.info(f"Semantic cache hit (similarity {best_score:.3f})")
+            self.semantic_hits += 1
+            return best_fixed
+        return None
+
+    def put(self, key: bytes, fixed: str, file_hash: Optional[bytes] = None,
+            embedding: Optional[Sequence[float]] = None):
+        """Store a response, replacing any previous entry for the key"""
+        blob = _normalize(embedding).tobytes() if embedding else None
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fixes (key, fixed, embedding, file_hash, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, fixed, blob, file_hash, time.time())
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to store cache entry: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Lookup counters since startup and the number of stored entries.
+        A semantic hit follows an exact-match miss, so it is counted in both."""
+        try:
+            entries = self._conn.execute("SELECT COUNT(*) FROM fixes").fetchone()[0]
+        except sqlite3.Error:
+            entries = -1
+        return {
+            'hits': self.hits,
+            'semantic_hits': self.semantic_hits,
+            'misses': self.misses,
+            'entries': entries
+        }
+
+    def close(self):
+        self._conn.close()
+
+def _normalize(vector: Sequence[float]) -> array:
+    """Scale a vector to unit length so a dot product is the cosine similarity"""
+    norm = math.sqrt(math.fsum(x * x for x in vector)) or 1.0
+    return array('f', (x / norm for x in vector))
@@ -11,58 +11,41 @@ class Config:
     
     def __init__(self):
         self.load_env_file()
+        self.load_settings()
         self.validate_required_config()
         
     def load_env_file(self):
         """Load environment variables from .env file if it exists"""
-        env_file = Path('.env')
-        if env_file.exists():
-            with open(env_file, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        os.environ.setdefault(key.strip(), value.strip())
-    
-    @property
-    def openai_api_key(self) -> str:
-        return os.getenv("OPENAI_API_KEY", "")
-    
-    @property
-    def openai_model(self) -> str:
-        return os.getenv("OPENAI_MODEL", "gpt-4")
-    
-    @property
-    def github_token(self) -> str:
-        return os.getenv("GITHUB_TOKEN", "")
-    
-    @property
-    def github_repository(self) -> str:
-        return os.getenv("GITHUB_REPOSITORY", "")
-    
-    @property
-    def github_base_branch(self) -> str:
-        return os.getenv("GITHUB_BASE_BRANCH", "main")
-    
-    @property
-    def max_retry_attempts(self) -> int:
-        return int(os.getenv("MAX_RETRY_ATTEMPTS", "3"))
-    
-    @property
-    def healing_timeout(self) -> int:
-        return int(os.getenv("HEALING_TIMEOUT", "300"))
-    
-    @property
-    def branch_prefix(self) -> str:
-        return os.getenv("BRANCH_PREFIX", "fix/ai-heal")
-    
-    @property
-    def log_level(self) -> str:
-        return os.getenv("LOG_LEVEL", "INFO")
+        try:
+            data = Path('.env').read_text()
+        except FileNotFoundError:
+            return
+        
+        for line in data.splitlines():
+            line = line.strip()
+            if not line or line[0] == '#' or '=' not in line:
+                continue
+            key, _, value = line.partition('=')
+            os.environ.setdefault(key.strip(), value.strip())
     
-    @property
-    def log_file(self) -> str:
-        return os.getenv("LOG_FILE", "healer.log")
+    def load_settings(self):
+        """Read settings from the environment once; they are plain attributes afterwards"""
+        self.openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
+        self.openai_model: str = os.getenv("OPENAI_MODEL", "gpt-4")
+        self.openai_analysis_model: str = os.getenv("OPENAI_ANALYSIS_MODEL", "gpt-4o-mini")
+        self.github_token: str = os.getenv("GITHUB_TOKEN", "")
+        self.github_repository: str = os.getenv("GITHUB_REPOSITORY", "")
+        self.github_base_branch: str = os.getenv("GITHUB_BASE_BRANCH", "main")
+        self.max_retry_attempts: int = int(os.getenv("MAX_RETRY_ATTEMPTS", "3"))
+        self.healing_timeout: int = int(os.getenv("HEALING_TIMEOUT", "300"))
+        self.max_concurrency: int = int(os.getenv("MAX_CONCURRENCY", "4"))
+        self.branch_prefix: str = os.getenv("BRANCH_PREFIX", "fix/ai-heal")
+        self.llm_cache_path: str = os.getenv("LLM_CACHE_PATH", str(Path.home() / ".cache" / "self-healing-cicd" / "llm_cache.db"))
+        self.llm_cache_ttl: int = int(os.getenv("LLM_CACHE_TTL", "604800"))
+        self.semantic_cache_enabled: bool = os.getenv("LLM_SEMANTIC_CACHE", "false").lower() == "true"
+        self.openai_embedding_model: str = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+        self.log_level: str = os.getenv("LOG_LEVEL", "INFO")
+        self.log_file: str = os.getenv("LOG_FILE", "healer.log")
     
     def validate_required_config(self):
         """Validate that required configuration is present"""
@@ -1,15 +1,55 @@
 import os
-import subprocess
+import asyncio
 import logging
-import requests
-from typing import Optional, Dict, Any
+import string
+from pathlib import Path
+from typing import Optional, Dict, Any, List
 from .config import config
 
 logger = logging.getLogger(__name__)
 
+# Commit identity passed per invocation with `git -c`, so the healer never
+# has to rewrite the user's global git configuration.
+GIT_IDENTITY = ["-c", "user.email=ai-healer@cicd.bot", "-c", "user.name=AI Healer Bot"]
+
+GITHUB_API_URL = "https://api.github.com"
+GITHUB_MAX_RETRIES = 3
+GITHUB_RETRY_STATUSES = {502, 503, 504}
+GITHUB_BACKOFF_FACTOR = 0.3
+
+PR_FOOTER_TEMPLATE = string.Template("""## 🤖 AI-Generated Fix
+
+$body
+
+---
+
+### 🔧 Automated Healing Details
+- **Branch**: `$branch_name`
+- **Generated by**: AI Healer Agent
+- **Timestamp**: $timestamp
+
+### ✅ Pre-merge Checklist
+- [ ] Review the proposed changes
+- [ ] Verify tests pass locally
+- [ ] Check for any side effects
+- [ ] Confirm the fix addresses the root cause
+
+### 🚀 Next Steps
+1. Review the changes in this PR
+2. Run tests locally to verify the fix
+3. Merge if everything looks good
+4. Monitor for any regressions
+
+*This PR was automatically generated by the AI-Driven Self-Healing CI/CD Platform.*
+""")
+
 class GitOps:
     """Enhanced Git operations with comprehensive error handling and validation"""
     
+    # Every GitOps instance operates on the same working tree, so concurrent
+    # heals must take this lock around branch/commit/push sequences.
+    worktree_lock = asyncio.Lock()
+    
     def __init__(self):
         self.repo_url = config.github_repository
         self.token = config.github_token
@@ -19,42 +59,82 @@ class GitOps:
         if not self.token or not self.repo_url:
             logger.warning("GitHub token or repository not configured. Some operations may fail.")
         
-        self._setup_git_config()
-        
-    def _setup_git_config(self):
-        """Setup git configuration for the healer agent"""
-        try:
-            self.run_cmd("git config --global user.email 'ai-healer@cicd.bot'")
-            self.run_cmd("git config --global user.name 'AI Healer Bot'")
-            logger.info("Git configuration setup completed")
-        except Exception as e:
-            logger.warning(f"Failed to setup git config: {e}")
+        self._http = None
+        self._base_commit = None
+
+    @property
+    def http(self):
+        """GitHub API client, created on first use and kept open so later
+        requests reuse its pooled keep-alive connection"""
+        if self._http is None:
+            import httpx  # only needed once a fix is ready to be proposed
+            
+            self._http = httpx.AsyncClient(
+                base_url=GITHUB_API_URL,
+                headers={
+                    "Authorization": f"Bearer {self.token}",
+                    "Accept": "application/vnd.github.v3+json"
+                },
+                timeout=30,
+                transport=httpx.AsyncHTTPTransport(
+                    retries=GITHUB_MAX_RETRIES,  # connection failures only
+                    limits=httpx.Limits(max_connections=4, max_keepalive_connections=4)
+                )
+            )
+        return self._http
+
+    async def close(self):
+        """Close the GitHub API client's pooled connections"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _github_request(self, method: str, url: str, **kwargs):
+        """Send a GitHub API request, retrying transient gateway errors with backoff"""
+        for attempt in range(GITHUB_MAX_RETRIES + 1):
+            response = await self.http.request(method, url, **kwargs)
+            if response.status_code not in GITHUB_RETRY_STATUSES or attempt == GITHUB_MAX_RETRIES:
+                return response
+            
+            delay = GITHUB_BACKOFF_FACTOR * (2 ** attempt)
+            logger.warning("GitHub API returned %s, retrying in %.1fs", response.status_code, delay)
+            await asyncio.sleep(delay)
 
-    def run_cmd(self, cmd: str, check_output: bool = True) -> str:
-        """Execute git command with proper error handling"""
-        logger.debug(f"Executing: {cmd}")
+    async def run_cmd(self, args: List[str], check_output: bool = True) -> str:
+        """Execute git command with proper error handling.
+
+        The command is given as an argv list and executed without a shell,
+        so arguments never need quoting.
+        """
+        cmd = " ".join(args)
+        logger.debug("Executing: %s", cmd)
         
         try:
-            result = subprocess.run(
-                cmd, 
-                shell=True, 
-                capture_output=True, 
-                text=True,
-                timeout=30  # Prevent hanging
+            proc = await asyncio.create_subprocess_exec(
+                *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
             )
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=30)  # Prevent hanging
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                # Also on cancellation, e.g. a prefetch whose heal found nothing to fix
+                proc.kill()
+                await proc.wait()
+                raise
             
-            if result.returncode != 0:
-                error_msg = f"Command failed: {cmd}\nError: {result.stderr}"
+            if proc.returncode != 0:
+                error_msg = f"Command failed: {cmd}\nError: {stderr.decode(errors='replace')}"
                 logger.error(error_msg)
                 if check_output:
                     raise Exception(error_msg)
                 return ""
             
-            output = result.stdout.strip()
-            logger.debug(f"Command output: {output}")
+            output = stdout.decode(errors='replace').strip()
+            logger.debug("Command output: %s", output)
             return output
             
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             error_msg = f"Command timed out: {cmd}"
             logger.error(error_msg)
             raise Exception(error_msg)
@@ -63,46 +143,79 @@ class GitOps:
             logger.error(error_msg)
             raise Exception(error_msg)
 
-    def get_current_branch(self) -> str:
+    async def get_current_branch(self) -> str:
         """Get the current git branch"""
-        return self.run_cmd("git rev-parse --abbrev-ref HEAD")
+        return await self.run_cmd(["git", "rev-parse", "--abbrev-ref", "HEAD"])
 
-    def is_clean_working_directory(self) -> bool:
+    async def is_clean_working_directory(self) -> bool:
         """Check if working directory is clean"""
         try:
-            output = self.run_cmd("git status --porcelain", check_output=False)
+            output = await self.run_cmd(["git", "status", "--porcelain"], check_output=False)
             return len(output.strip()) == 0
         except:
             return False
 
-    def create_branch(self, branch_name: str) -> bool:
-        """Create a new branch with validation"""
+    async def fetch_base(self) -> bool:
+        """Fetch the base branch and pin the commit the fix branch will start
+        from, so the failing file can be read at that commit; create_branch
+        then skips its own fetch"""
+        async with self.worktree_lock:
+            try:
+                await self.run_cmd(["git", "fetch", "origin", self.base_branch])
+                # FETCH_HEAD is shared by every heal; keep this heal's commit
+                self._base_commit = await self.run_cmd(["git", "rev-parse", "FETCH_HEAD"])
+            except Exception as e:
+                logger.error("Failed to fetch %s: %s", self.base_branch, e)
+                return False
+        return True
+
+    async def read_base_file(self, file_path: str) -> bytes:
+        """Contents of a file at the commit pinned by fetch_base.
+
+        Concurrent heals share the working tree, which may have another
+        heal's fix branch checked out, so the file is read from git instead.
+        """
+        spec = f"{self._base_commit}:./{Path(os.path.relpath(file_path)).as_posix()}"
+        proc = await asyncio.create_subprocess_exec(
+            "git", "show", spec,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=30)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+        
+        if proc.returncode != 0:
+            raise FileNotFoundError(f"{file_path} not found at {self.base_branch}: "
+                                    f"{stderr.decode(errors='replace').strip()}")
+        return stdout
+
+    async def create_branch(self, branch_name: str) -> bool:
+        """Create a new branch from the latest base branch.
+
+        Fetching the base and branching from it with `checkout -B`
+        replaces the checkout/pull/branch-list/delete/create sequence with
+        two git processes; `-B` resets the branch if it already exists.
+        """
         try:
-            # Ensure we're on the base branch
-            current_branch = self.get_current_branch()
-            if current_branch != self.base_branch:
-                logger.info(f"Switching from {current_branch} to {self.base_branch}")
-                self.run_cmd(f"git checkout {self.base_branch}")
-            
-            # Pull latest changes
-            self.run_cmd(f"git pull origin {self.base_branch}")
-            
-            # Check if branch already exists
-            existing_branches = self.run_cmd("git branch -a", check_output=False)
-            if branch_name in existing_branches:
-                logger.warning(f"Branch {branch_name} already exists, deleting it")
-                self.run_cmd(f"git branch -D {branch_name}", check_output=False)
-            
-            # Create new branch
-            self.run_cmd(f"git checkout -b {branch_name}")
-            logger.info(f"Created and switched to branch: {branch_name}")
+            # Fetch latest changes, unless fetch_base already has
+            if self._base_commit is None:
+                await self.run_cmd(["git", "fetch", "origin", self.base_branch])
+            base, self._base_commit = self._base_commit or "FETCH_HEAD", None
+            
+            # Create (or reset) the branch on top of them
+            await self.run_cmd(["git", "checkout", "-B", branch_name, base])
+            logger.info("Created and switched to branch: %s", branch_name)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to create branch {branch_name}: {e}")
+            logger.error("Failed to create branch %s: %s", branch_name, e)
             return False
 
-    def commit_changes(self, file_path: str, message: str) -> bool:
+    async def commit_changes(self, file_path: str, message: str) -> bool:
         """Commit changes with validation"""
         try:
             # Verify file exists
@@ -110,25 +223,18 @@ class GitOps:
                 raise Exception(f"File {file_path} does not exist")
             
             # Add file
-            self.run_cmd(f"git add {file_path}")
-            
-            # Check if there are changes to commit
-            status = self.run_cmd("git status --porcelain", check_output=False)
-            if not status.strip():
-                logger.warning("No changes to commit")
-                return False
+            await self.run_cmd(["git", "add", "--", file_path])
             
-            # Commit changes
-            escaped_message = message.replace("'", "\\'")
-            self.run_cmd(f"git commit -m '{escaped_message}'")
-            logger.info(f"Committed changes to {file_path}")
+            # Commit changes; git itself fails if there is nothing to commit
+            await self.run_cmd(["git", *GIT_IDENTITY, "commit", "-m", message])
+            logger.info("Committed changes to %s", file_path)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to commit changes: {e}")
+            logger.error("Failed to commit changes: %s", e)
             return False
 
-    def push_changes(self, branch_name: str) -> bool:
+    async def push_changes(self, branch_name: str) -> bool:
         """Push changes to remote repository"""
         if not self.token or not self.repo_url:
             logger.error("GitHub token or repository not configured")
@@ -139,27 +245,22 @@ class GitOps:
             remote_url = f"https://{self.token}@github.com/{self.repo_url}.git"
             
             # Push the branch
-            self.run_cmd(f"git push {remote_url} {branch_name}")
-            logger.info(f"Successfully pushed branch {branch_name}")
+            await self.run_cmd(["git", "push", remote_url, branch_name])
+            logger.info("Successfully pushed branch %s", branch_name)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to push changes: {e}")
+            logger.error("Failed to push changes: %s", e)
             return False
 
-    def create_pr(self, branch_name: str, title: str, body: str) -> Optional[str]:
+    async def create_pr(self, branch_name: str, title: str, body: str) -> Optional[str]:
         """Create a pull request using GitHub API"""
         if not self.token or not self.repo_url:
             logger.error("GitHub token or repository not configured")
             return None
         
         try:
-            url = f"https://api.github.com/repos/{self.repo_url}/pulls"
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Accept": "application/vnd.github.v3+json",
-                "Content-Type": "application/json"
-            }
+            url = f"/repos/{self.repo_url}/pulls"
             
             data = {
                 "title": title,
@@ -168,80 +269,59 @@ class GitOps:
                 "base": self.base_branch
             }
             
-            response = requests.post(url, json=data, headers=headers, timeout=30)
+            response = await self._github_request("POST", url, json=data)
             
             if response.status_code == 201:
                 pr_data = response.json()
                 pr_url = pr_data.get('html_url')
-                logger.info(f"PR created successfully: {pr_url}")
+                logger.info("PR created successfully: %s", pr_url)
                 return pr_url
             else:
-                logger.error(f"Failed to create PR: {response.status_code} - {response.text}")
+                logger.error("Failed to create PR: %s - %s", response.status_code, response.text)
                 return None
                 
         except Exception as e:
-            logger.error(f"Failed to create PR: {e}")
+            logger.error("Failed to create PR: %s", e)
             return None
 
     def _enhance_pr_body(self, body: str, branch_name: str) -> str:
         """Enhance PR body with additional context"""
-        enhanced_body = f"""## 🤖 AI-Generated Fix
-
-{body}
-
----
-
-### 🔧 Automated Healing Details
-- **Branch**: `{branch_name}`
-- **Generated by**: AI Healer Agent
-- **Timestamp**: {self._get_timestamp()}
-
-### ✅ Pre-merge Checklist
-- [ ] Review the proposed changes
-- [ ] Verify tests pass locally
-- [ ] Check for any side effects
-- [ ] Confirm the fix addresses the root cause
-
-### 🚀 Next Steps
-1. Review the changes in this PR
-2. Run tests locally to verify the fix
-3. Merge if everything looks good
-4. Monitor for any regressions
-
-*This PR was automatically generated by the AI-Driven Self-Healing CI/CD Platform.*
-"""
-        return enhanced_body
+        return PR_FOOTER_TEMPLATE.substitute(
+            body=body,
+            branch_name=branch_name,
+            timestamp=self._get_timestamp()
+        )
 
     def _get_timestamp(self) -> str:
         """Get current timestamp for PR body"""
         from datetime import datetime
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
 
-    def cleanup_branch(self, branch_name: str) -> bool:
+    async def cleanup_branch(self, branch_name: str) -> bool:
         """Clean up the healing branch after PR is merged"""
         try:
             # Switch back to base branch
-            self.run_cmd(f"git checkout {self.base_branch}")
+            await self.run_cmd(["git", "checkout", self.base_branch])
             
             # Delete local branch
-            self.run_cmd(f"git branch -D {branch_name}", check_output=False)
+            await self.run_cmd(["git", "branch", "-D", branch_name], check_output=False)
             
-            logger.info(f"Cleaned up branch: {branch_name}")
+            logger.info("Cleaned up branch: %s", branch_name)
             return True
             
         except Exception as e:
-            logger.warning(f"Failed to cleanup branch {branch_name}: {e}")
+            logger.warning("Failed to cleanup branch %s: %s", branch_name, e)
             return False
 
-    def get_repo_info(self) -> Dict[str, Any]:
+    async def get_repo_info(self) -> Dict[str, Any]:
         """Get repository information"""
         try:
             return {
-                'current_branch': self.get_current_branch(),
-                'is_clean': self.is_clean_working_directory(),
-                'remote_url': self.run_cmd("git remote get-url origin", check_output=False),
-                'last_commit': self.run_cmd("git log -1 --oneline", check_output=False)
+                'current_branch': await self.get_current_branch(),
+                'is_clean': await self.is_clean_working_directory(),
+                'remote_url': await self.run_cmd(["git", "remote", "get-url", "origin"], check_output=False),
+                'last_commit': await self.run_cmd(["git", "log", "-1", "--oneline"], check_output=False)
             }
         except Exception as e:
-            logger.error(f"Failed to get repo info: {e}")
+            logger.error("Failed to get repo info: %s", e)
             return {}
@@ -1,168 +1,612 @@
 import os
-import openai
-import time
+import json
+import random
+import asyncio
+import sqlite3
 import logging
-from typing import Dict, Any, Optional
+import functools
+from typing import Dict, Any, Optional, List, Tuple, ClassVar
 from .config import config
+from .cache import FixCache
 
 logger = logging.getLogger(__name__)
 
+# Lines of context sent on each side of the failing line. Larger files are
+# sent as an excerpt and the fixed excerpt is spliced back in locally.
+FIX_CONTEXT_LINES = 200
+
+# Fixes requested per batched prompt; bigger batches make each reply slower
+FIX_BATCH_SIZE = 4
+
+# Opening words of a prose reply. The system prompt asks for bare code, so a
+# streamed reply starting like this is abandoned without waiting for the rest,
+# unless the code sent starts with the same line (an excerpt can begin inside
+# a docstring or comment).
+PROSE_OPENERS = ("I'm", "I am", "Sorry", "Unfortunately", "Here is", "Here's", "As an AI")
+
+# Retry backoff: exponential from RETRY_BASE_DELAY seconds with full jitter,
+# so concurrent heals that hit a rate limit together do not retry together
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+# Context window of each model family, matched by name prefix in this order.
+# Unknown models are budgeted like plain gpt-4, the smallest window listed.
+MODEL_CONTEXT_TOKENS = (
+    ('gpt-4o', 128000),
+    ('gpt-4-turbo', 128000),
+    ('gpt-4-1106', 128000),
+    ('gpt-4-0125', 128000),
+    ('gpt-4-32k', 32768),
+    ('gpt-3.5-turbo', 16385),
+    ('gpt-4', 8192),
+)
+DEFAULT_CONTEXT_TOKENS = 8192
+
+# Models that accept response_format={"type": "json_object"}. Others (the
+# default gpt-4 included) are asked for JSON in the prompt only.
+JSON_MODE_MODELS = ('gpt-4o', 'gpt-4-turbo', 'gpt-4-1106', 'gpt-4-0125', 'gpt-3.5-turbo-1106', 'gpt-3.5-turbo-0125')
+
+# A fix reply may use whatever the context window has left after the prompt,
+# up to MAX_FIX_TOKENS; TOKEN_HEADROOM stays free in case counts run short
+MAX_FIX_TOKENS = 4096
+TOKEN_HEADROOM = 256
+
+# Token cap on the excerpt sent for a fix. The reply echoes the excerpt back,
+# so it must fit in MAX_FIX_TOKENS and in half the context window; when
+# FIX_CONTEXT_LINES of long lines don't, the window is narrowed until it fits.
+MAX_EXCERPT_TOKENS = MAX_FIX_TOKENS - TOKEN_HEADROOM
+
+@functools.lru_cache(maxsize=None)
+def _get_openai():
+    """Import the OpenAI SDK on first use; it is slow to import and heals that
+    exit early (missing log, no error found) never need it."""
+    import openai
+    return openai
+
+@functools.lru_cache(maxsize=None)
+def _get_encoder(model: str):
+    """tiktoken encoder for the model, or None when tiktoken is not installed"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text: str, model: str) -> int:
+    """Count tokens with tiktoken when available, otherwise overestimate:
+    code averages three to four characters per token"""
+    encoder = _get_encoder(model)
+    if encoder is None:
+        return len(text) // 3 + 1
+    return len(encoder.encode(text))
+
+# Static prefix sent verbatim as the system message on every fix request.
+# Keep it byte-identical between calls (no timestamps, session IDs or other
+# per-run values) so the provider can reuse its cached prefix.
+STATIC_INSTRUCTIONS = """You are an expert Python developer and debugging specialist. 
+Your task is to analyze failing code and provide precise fixes.
+
+Rules:
+1. Return ONLY the complete fixed file content, or ONLY the complete fixed excerpt when given an excerpt
+2. Do not include markdown formatting or code blocks
+3. Preserve all existing functionality while fixing the specific error
+4. Make minimal changes - only fix what's broken
+5. Ensure the fix is syntactically correct and follows Python best practices
+6. If the error is in a test, fix the test logic, not the implementation (unless the implementation is clearly wrong)
+
+ANALYSIS CONTEXT:
+- This is part of a CI/CD pipeline that failed
+- The error occurred during automated testing
+- Focus on fixing the specific assertion or logic error
+- Maintain backward compatibility with existing code
+
+The user message contains the failing file path, line number, error message
+and the current file content, or an excerpt of it around the failing line.
+Provide the complete fixed file content, or the complete fixed excerpt
+(the same lines, fixed, keeping their original indentation)."""
+
+# Sent instead of STATIC_INSTRUCTIONS for batched requests. It only appends
+# to the static prefix so batched and single requests share a cached prefix.
+BATCH_FIX_INSTRUCTIONS = STATIC_INSTRUCTIONS + """
+
+When the user message contains several numbered ITEM blocks, each is a
+separate failing file: fix every item independently and, instead of bare
+code, return only JSON of the form
+{"fixes": [{"id": 0, "content": "<fixed file content or excerpt>"}, ...]}
+with one entry per item."""
+
+ANALYSIS_INSTRUCTIONS = """You are a log analysis expert. Return only valid JSON.
+
+Analyze the test failure log in the user message and extract key information.
+
+Please identify:
+1. The failing file path
+2. The specific error message
+3. The line number where the error occurred
+4. The type of error (assertion, syntax, import, etc.)
+5. A brief explanation of what went wrong
+
+Return your analysis in this exact JSON format:
+{
+    "file_path": "path/to/file.py",
+    "error_message": "specific error message",
+    "line_number": 123,
+    "error_type": "assertion|syntax|import|runtime",
+    "explanation": "brief explanation of the issue"
+}"""
+
+class TruncatedReplyError(Exception):
+    """The reply stopped at max_tokens, so the code in it is incomplete"""
+
 class LLMClient:
     """Enhanced LLM client with retry logic and better error handling"""
     
+    SYSTEM_PROMPT: ClassVar[str] = STATIC_INSTRUCTIONS
+    
     def __init__(self):
         self.api_key = config.openai_api_key
         self.model = config.openai_model
+        self.analysis_model = config.openai_analysis_model
         self.max_retries = config.max_retry_attempts
         
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Please set OPENAI_API_KEY environment variable.")
         
-        self.client = openai.OpenAI(api_key=self.api_key)
+        self._client = None
+        self._http = None
+        self._system_tokens = None
         logger.info(f"LLM Client initialized with model: {self.model}")
+        
+        self._cache = None
+        if config.llm_cache_path:
+            try:
+                self._cache = FixCache(config.llm_cache_path, config.llm_cache_ttl)
+            except (sqlite3.Error, OSError) as e:
+                # The cache only saves API calls; an unusable path (e.g. a
+                # read-only HOME in CI) must not stop the heal
+                logger.warning(f"LLM response cache disabled: {e}")
 
-    def get_fix(self, file_content: str, error_info: Dict[str, Any]) -> str:
+    @property
+    def client(self):
+        """Async OpenAI client, created on first use and reused for every call"""
+        if self._client is None:
+            import httpx
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=config.max_concurrency,
+                    max_keepalive_connections=config.max_concurrency
+                )
+            )
+            self._client = _get_openai().AsyncOpenAI(api_key=self.api_key, http_client=self._http)
+        return self._client
+
+    async def warm_up(self):
+        """Open a pooled connection to the API ahead of the first real request,
+        so that request does not pay for the TCP and TLS handshakes"""
+        try:
+            # The SDK import is slow; keep it off the event loop
+            await asyncio.to_thread(_get_openai)
+            # Unauthenticated and answered with a 401, but it leaves a
+            # keep-alive connection in the pool
+            url = str(self.client.base_url.join("models"))
+            await self._http.head(url)
+        except Exception as e:
+            logger.debug(f"Connection warm-up failed: {e}")
+
+    async def close(self):
+        """Close the pooled HTTP connections and the response cache"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            self._http = None
+        if self._cache:
+            self._cache.close()
+            self._cache = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def run_many(self, requests: List[Tuple[str, Dict[str, Any]]]) -> List[Optional[str]]:
+        """Get fixes for several (file_content, error_info) pairs concurrently,
+        with at most config.max_concurrency requests in flight. A request that
+        fails gets None; the other fixes are returned regardless."""
+        semaphore = asyncio.Semaphore(config.max_concurrency)
+        
+        async def bounded_fix(file_content: str, error_info: Dict[str, Any]) -> Optional[str]:
+            try:
+                async with semaphore:
+                    return await self.get_fix(file_content, error_info)
+            except Exception as e:
+                logger.error(f"Failed to get fix for {error_info.get('file_path', 'item')}: {e}")
+                return None
+        
+        return await asyncio.gather(*(bounded_fix(c, e) for c, e in requests))
+
+    async def get_fix(self, file_content: str, error_info: Dict[str, Any]) -> str:
         """
         Sends the code and error info to the LLM and returns the fixed code.
-        Includes retry logic and enhanced prompting.
+        Includes retry logic, enhanced prompting and a local response cache.
         """
-        prompt = self._build_fix_prompt(file_content, error_info)
+        error_message = str(error_info.get('error_message', ''))
+        lines, start, end, prompt = self._windowed_prompt(file_content, error_info)
+        if count_tokens(''.join(lines[start:end]), self.model) > self._excerpt_budget():
+            # Typically a whole file sent for want of a line number. The reply
+            # must echo it back, so it could only come back truncated.
+            raise ValueError(f"{error_info.get('file_path', 'File')} is too large for {self.model}'s context window")
+        
+        cache_key = self._fix_cache_key(file_content, prompt)
+        file_hash = self._file_hash(file_content, error_info)
+        embedding = None
+        
+        if self._cache:
+            cached = self._cache.get(cache_key)
+            if cached is None and config.semantic_cache_enabled:
+                embedding = await self._embed(error_message)
+                if embedding:
+                    cached = self._cache.get_similar(file_hash, embedding)
+            if cached is not None:
+                logger.info("Returning cached fix")
+                return cached
+        
+        openai = _get_openai()
+        messages = [
+            {
+                "role": "system", 
+                "content": self.SYSTEM_PROMPT
+            },
+            {
+                "role": "user", 
+                "content": prompt
+            }
+        ]
+        max_tokens = self._fix_max_tokens(prompt)
+        sent_first_line = next((line.strip() for line in lines[start:end] if line.strip()), '')
         
         for attempt in range(self.max_retries):
             try:
                 logger.info(f"Requesting fix from LLM (attempt {attempt + 1}/{self.max_retries})")
                 
-                response = self.client.chat.completions.create(
+                response_text = await self._stream_completion(
                     model=self.model,
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": self._get_system_prompt()
-                        },
-                        {
-                            "role": "user", 
-                            "content": prompt
-                        }
-                    ],
+                    messages=messages,
                     temperature=0.1,  # Lower temperature for more consistent fixes
-                    max_tokens=2000
+                    max_tokens=max_tokens,
+                    sent_first_line=sent_first_line
                 )
                 
-                fixed_code = response.choices[0].message.content.strip()
-                fixed_code = self._clean_response(fixed_code)
+                fixed_code = self._splice_fix(lines, start, end, self._clean_response(response_text))
                 
                 logger.info("Successfully received fix from LLM")
+                if self._cache:
+                    self._cache.put(cache_key, fixed_code, file_hash, embedding)
                 return fixed_code
                 
-            except openai.RateLimitError as e:
-                logger.warning(f"Rate limit hit, waiting before retry: {e}")
-                time.sleep(2 ** attempt)  # Exponential backoff
-                
-            except openai.APIError as e:
-                logger.error(f"OpenAI API error (attempt {attempt + 1}): {e}")
+            except (openai.RateLimitError, openai.InternalServerError) as e:
+                logger.warning(f"Transient OpenAI error (attempt {attempt + 1}): {e}")
                 if attempt == self.max_retries - 1:
                     raise
-                time.sleep(1)
+                await asyncio.sleep(self._retry_delay(attempt, e))
+                
+            except openai.APIStatusError as e:
+                # Bad requests, auth and permission errors fail the same way every time
+                logger.error(f"OpenAI API error: {e}")
+                raise
+                
+            except TruncatedReplyError as e:
+                # The same prompt and budget would be cut off again
+                logger.error(str(e))
+                raise
                 
             except Exception as e:
                 logger.error(f"Unexpected error communicating with LLM: {e}")
                 if attempt == self.max_retries - 1:
                     raise
-                time.sleep(1)
+                await asyncio.sleep(self._retry_delay(attempt, e))
         
         raise Exception(f"Failed to get fix from LLM after {self.max_retries} attempts")
 
-    def _get_system_prompt(self) -> str:
-        """Get the system prompt for the LLM"""
-        return """You are an expert Python developer and debugging specialist. 
-Your task is to analyze failing code and provide precise fixes.
+    async def get_fixes_batched(self, items: List[Tuple[str, Dict[str, Any]]],
+                                batch_size: int = FIX_BATCH_SIZE) -> List[Optional[str]]:
+        """
+        Get fixes for several (file_content, error_info) pairs, asking for up
+        to batch_size of them per request and sending batches concurrently.
+        Items a batched reply leaves out or garbles are retried with get_fix,
+        as are items that end up alone in a batch. An item that still fails
+        gets None; the other fixes are returned regardless.
+        """
+        results: List[Optional[str]] = [None] * len(items)
+        pending = []
+        for index, (file_content, error_info) in enumerate(items):
+            if self._cache:
+                prompt = self._windowed_prompt(file_content, error_info)[3]
+                results[index] = self._cache.get(self._fix_cache_key(file_content, prompt))
+            if results[index] is None:
+                pending.append(index)
+        
+        semaphore = asyncio.Semaphore(config.max_concurrency)
+        
+        async def fix_batch(indices: List[int]):
+            if len(indices) > 1:
+                async with semaphore:
+                    fixes = await self._request_batch([items[i] for i in indices])
+            else:
+                fixes = [None]
+            for index, fixed_code in zip(indices, fixes):
+                if fixed_code is None:
+                    try:
+                        async with semaphore:
+                            fixed_code = await self.get_fix(*items[index])
+                    except Exception as e:
+                        logger.error(f"Failed to get fix for item {index}: {e}")
+                results[index] = fixed_code
+        
+        await asyncio.gather(*(fix_batch(batch) for batch in self._pack_batches(items, pending, batch_size)))
+        return results
 
-Rules:
-1. Return ONLY the complete fixed file content
-2. Do not include markdown formatting or code blocks
-3. Preserve all existing functionality while fixing the specific error
-4. Make minimal changes - only fix what's broken
-5. Ensure the fix is syntactically correct and follows Python best practices
-6. If the error is in a test, fix the test logic, not the implementation (unless the implementation is clearly wrong)"""
+    def _pack_batches(self, items: List[Tuple[str, Dict[str, Any]]], indices: List[int],
+                      batch_size: int) -> List[List[int]]:
+        """Group item indices, in order, into batches of at most batch_size
+        whose excerpts together fit the excerpt budget: the reply echoes every
+        excerpt, just as a single fix reply echoes its one excerpt"""
+        budget = self._excerpt_budget()
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        batch_tokens = 0
+        for index in indices:
+            lines, start, end, _ = self._windowed_prompt(*items[index])
+            tokens = count_tokens(''.join(lines[start:end]), self.model)
+            if batch and (len(batch) == batch_size or batch_tokens + tokens > budget):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(index)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _request_batch(self, batch: List[Tuple[str, Dict[str, Any]]]) -> List[Optional[str]]:
+        """Ask for every fix in the batch in one request; None marks items to retry alone"""
+        windows = []
+        blocks = []
+        for item_id, (file_content, error_info) in enumerate(batch):
+            lines, start, end, prompt = self._windowed_prompt(file_content, error_info)
+            windows.append((lines, start, end, prompt))
+            blocks.append(f"=== ITEM {item_id} ===\n{prompt}")
+        
+        try:
+            logger.info(f"Requesting {len(batch)} fixes from LLM in one batch")
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": BATCH_FIX_INSTRUCTIONS},
+                    {"role": "user", "content": "\n".join(blocks)}
+                ],
+                temperature=0.1,
+                **self._json_mode(self.model)
+            )
+            fixes = self._parse_json_reply(response.choices[0].message.content)['fixes']
+            contents = {int(fix['id']): fix['content'] for fix in fixes}
+        except Exception as e:
+            logger.warning(f"Batched fix request failed, fixing items individually: {e}")
+            return [None] * len(batch)
+        
+        results = []
+        for item_id, ((file_content, error_info), (lines, start, end, prompt)) in enumerate(zip(batch, windows)):
+            try:
+                fixed_code = self._splice_fix(lines, start, end, self._clean_response(contents[item_id]))
+            except (KeyError, AttributeError, ValueError):
+                logger.warning(f"Batched reply had no usable fix for item {item_id}")
+                results.append(None)
+                continue
+            if self._cache:
+                self._cache.put(self._fix_cache_key(file_content, prompt), fixed_code,
+                                self._file_hash(file_content, error_info))
+            results.append(fixed_code)
+        return results
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """Seconds to wait before the next attempt: the server's Retry-After
+        when given, otherwise exponential backoff with full jitter"""
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            return min(float(retry_after), RETRY_MAX_DELAY)
+        except (TypeError, ValueError):
+            return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+    async def _stream_completion(self, sent_first_line: str = '', **kwargs) -> str:
+        """Stream a chat completion, abandoning it as soon as it opens with prose.
+        A first line equal to sent_first_line, the first line of the code sent,
+        is taken as echoed code even if it reads like prose."""
+        # get_fix does its own jittered retries, so the SDK's are turned off here
+        client = self.client.with_options(max_retries=0)
+        stream = await client.chat.completions.create(stream=True, **kwargs)
+        chunks = []
+        checked = False
+        
+        finish_reason = None
+        
+        async for event in stream:
+            if not event.choices:
+                continue
+            finish_reason = event.choices[0].finish_reason or finish_reason
+            if not event.choices[0].delta.content:
+                continue
+            chunks.append(event.choices[0].delta.content)
+            
+            if not checked:
+                head = ''.join(chunks).lstrip()
+                if '\n' in head:
+                    checked = True
+                    first_line = head.split('\n', 1)[0].rstrip()
+                    if first_line.startswith(PROSE_OPENERS) and first_line != sent_first_line:
+                        await stream.response.aclose()
+                        raise ValueError(f"LLM replied with prose instead of code: {first_line[:80]}")
+        
+        if finish_reason == 'length':
+            raise TruncatedReplyError(f"LLM reply was cut off at max_tokens={kwargs.get('max_tokens')}")
+        return ''.join(chunks)
+
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        """Embed text for the semantic cache tier; failures just skip the tier"""
+        try:
+            response = await self.client.embeddings.create(model=config.openai_embedding_model, input=text)
+            return response.data[0].embedding
+        except Exception as e:
+            logger.warning(f"Failed to embed error message for semantic cache: {e}")
+            return None
+
+    def _json_mode(self, model: str) -> Dict[str, Any]:
+        """Request arguments that constrain the reply to valid JSON, where the model supports it"""
+        if model.startswith(JSON_MODE_MODELS):
+            return {"response_format": {"type": "json_object"}}
+        return {}
+
+    def _parse_json_reply(self, reply: str) -> Any:
+        """Parse a JSON reply. In JSON mode that is the whole reply; otherwise
+        any prose or code fence around the outermost object is ignored."""
+        return json.loads(reply[reply.index('{'):reply.rindex('}') + 1])
+
+    def _fix_max_tokens(self, prompt: str) -> int:
+        """Reply budget for a fix: what the model's context window has left
+        after the system prompt and this prompt, capped at MAX_FIX_TOKENS"""
+        available = self._prompt_budget() - count_tokens(prompt, self.model)
+        return max(TOKEN_HEADROOM, min(MAX_FIX_TOKENS, available))
+
+    def _prompt_budget(self) -> int:
+        """Tokens of the model's context window left for the prompt and reply
+        after the system prompt and TOKEN_HEADROOM"""
+        if self._system_tokens is None:
+            self._system_tokens = count_tokens(self.SYSTEM_PROMPT, self.model)
+        
+        window = next((size for prefix, size in MODEL_CONTEXT_TOKENS if self.model.startswith(prefix)),
+                      DEFAULT_CONTEXT_TOKENS)
+        return window - self._system_tokens - TOKEN_HEADROOM
 
-    def _build_fix_prompt(self, file_content: str, error_info: Dict[str, Any]) -> str:
-        """Build a comprehensive prompt for the LLM"""
-        return f"""
-TASK: Fix the failing code
+    def _fix_cache_key(self, file_content: str, prompt: str) -> bytes:
+        """Exact-match cache key: everything the request sends, plus the whole
+        file the fixed excerpt is spliced back into"""
+        return FixCache.make_key(self.model, self.SYSTEM_PROMPT, prompt, file_content)
 
-FILE PATH: {error_info.get('file_path', 'Unknown')}
+    def _file_hash(self, file_content: str, error_info: Dict[str, Any]) -> bytes:
+        """Context the semantic tier must match exactly: only errors in the same
+        file, with the same content and model, can share a fix"""
+        return FixCache.make_key(self.model, str(error_info.get('file_path', '')), file_content)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit/miss counters and entry count of the response cache"""
+        return self._cache.stats() if self._cache else {}
+
+    def _excerpt_budget(self) -> int:
+        """Token cap on the code sent for a fix: the reply echoes it back, so
+        it gets half of the prompt budget, less TOKEN_HEADROOM for the prompt's
+        header and error message"""
+        return min(MAX_EXCERPT_TOKENS, (self._prompt_budget() - TOKEN_HEADROOM) // 2)
+
+    def _windowed_prompt(self, file_content: str, error_info: Dict[str, Any]) -> Tuple[List[str], int, int, str]:
+        """Split the file into lines and build the prompt for the window around
+        the failing line; the rest of the file is sent unchanged"""
+        lines = file_content.splitlines(keepends=True)
+        start, end = self._fix_window(lines, error_info.get('line_number'))
+        excerpt = (start, end, len(lines)) if (start, end) != (0, len(lines)) else None
+        return lines, start, end, self._build_fix_prompt(''.join(lines[start:end]), error_info, excerpt)
+
+    def _splice_fix(self, lines: List[str], start: int, end: int, fixed_code: str) -> str:
+        """Put a fixed excerpt back between the untouched lines around it"""
+        if (start, end) == (0, len(lines)):
+            return fixed_code
+        return ''.join(lines[:start]) + fixed_code + '\n' + ''.join(lines[end:])
+
+    def _fix_window(self, lines: List[str], line_number: Any) -> Tuple[int, int]:
+        """Line range (0-based, end exclusive) to send: FIX_CONTEXT_LINES either
+        side of the failing line, halved until the excerpt fits the token
+        budget, or the whole file when the line is unknown"""
+        total_lines = len(lines)
+        try:
+            line_number = int(line_number)
+        except (TypeError, ValueError):
+            return 0, total_lines
+        
+        if not 1 <= line_number <= total_lines:
+            return 0, total_lines
+        
+        budget = self._excerpt_budget()
+        context = FIX_CONTEXT_LINES
+        while True:
+            start, end = max(0, line_number - 1 - context), min(total_lines, line_number + context)
+            if context == 0 or count_tokens(''.join(lines[start:end]), self.model) <= budget:
+                return start, end
+            context //= 2
+
+    def _build_fix_prompt(self, file_content: str, error_info: Dict[str, Any],
+                          excerpt: Optional[Tuple[int, int, int]] = None) -> str:
+        """Build the per-request prompt; only dynamic details belong here"""
+        if excerpt:
+            start, end, total = excerpt
+            content_header = (f"CURRENT FILE CONTENT (EXCERPT: lines {start + 1}-{end} of {total}; "
+                              f"return only these lines, fixed):")
+        else:
+            content_header = "CURRENT FILE CONTENT:"
+        
+        return f"""FILE PATH: {error_info.get('file_path', 'Unknown')}
 LINE NUMBER: {error_info.get('line_number', 'Unknown')}
 ERROR MESSAGE: {error_info.get('error_message', 'Unknown error')}
 
-CURRENT FILE CONTENT:
+{content_header}
 {file_content}
-
-ANALYSIS CONTEXT:
-- This is part of a CI/CD pipeline that failed
-- The error occurred during automated testing
-- Focus on fixing the specific assertion or logic error
-- Maintain backward compatibility with existing code
-
-Please provide the complete fixed file content:
 """
 
     def _clean_response(self, response: str) -> str:
         """Clean up the LLM response to extract just the code"""
+        # Trim surrounding blank lines but keep the first line's indentation:
+        # an excerpt may start inside an indented block
+        response = response.rstrip().lstrip('\r\n')
+        
         # Remove common markdown formatting
-        if response.startswith("```python"):
-            response = response.replace("```python", "", 1)
-        if response.startswith("```"):
-            response = response.replace("```", "", 1)
-        if response.endswith("```"):
-            response = response[:-3]
+        response = response.removeprefix("```python3").removeprefix("```python").removeprefix("```").removesuffix("```")
         
-        # Remove any leading/trailing whitespace
-        response = response.strip()
+        # Remove any leading/trailing blank lines
+        response = response.rstrip().lstrip('\r\n')
         
         # Validate that we have actual Python code
-        if not response or len(response.split('\n')) < 2:
+        if response.count('\n') < 1:
             raise ValueError("LLM returned invalid or empty code")
         
         return response
 
-    def analyze_error(self, log_content: str) -> Optional[Dict[str, Any]]:
+    async def analyze_error(self, log_content: str) -> Optional[Dict[str, Any]]:
         """Use LLM to analyze complex error logs"""
-        prompt = f"""
-Analyze this test failure log and extract key information:
-
-LOG CONTENT:
-{log_content}
-
-Please identify:
-1. The failing file path
-2. The specific error message
-3. The line number where the error occurred
-4. The type of error (assertion, syntax, import, etc.)
-5. A brief explanation of what went wrong
-
-Return your analysis in this exact JSON format:
-{{
-    "file_path": "path/to/file.py",
-    "error_message": "specific error message",
-    "line_number": 123,
-    "error_type": "assertion|syntax|import|runtime",
-    "explanation": "brief explanation of the issue"
-}}
-"""
+        prompt = f"LOG CONTENT:\n{log_content}\n"
+        cache_key = FixCache.make_key(self.analysis_model, ANALYSIS_INSTRUCTIONS, prompt)
+        if self._cache:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.info("Returning cached log analysis")
+                return json.loads(cached)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            # Extracting file/line/error is a classification task, so it runs
+            # on the cheaper analysis model in JSON mode; fixes use self.model
+            response = await self.client.chat.completions.create(
+                model=self.analysis_model,
                 messages=[
-                    {"role": "system", "content": "You are a log analysis expert. Return only valid JSON."},
+                    {"role": "system", "content": ANALYSIS_INSTRUCTIONS},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.1
+                temperature=0.1,
+                **self._json_mode(self.analysis_model)
             )
             
-            import json
-            analysis = json.loads(response.choices[0].message.content.strip())
+            analysis = self._parse_json_reply(response.choices[0].message.content)
             logger.info("LLM successfully analyzed error log")
+            if self._cache:
+                self._cache.put(cache_key, json.dumps(analysis))
             return analysis
             
         except Exception as e:
@@ -1,53 +1,94 @@
+import os
 import re
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Union, BinaryIO
 
 logger = logging.getLogger(__name__)
 
+# Failure reports sit at the end of a CI log, so parse_failure_stream parses
+# only this much of its tail unless nothing is found there
+STREAM_TAIL_BYTES = 64 * 1024
+
+# Every failure format we understand mentions one of these words, so a single
+# scan for them lets clean logs skip all of the per-format parsing.
+_ERROR_WORDS = re.compile(r'error|fail|traceback', re.IGNORECASE)
+
+# Compiled once at import and shared by every LogParser instance. Patterns
+# that only match exception names, numbers and whitespace use re.ASCII;
+# PYTEST_FILE_PATTERN keeps Unicode \w so non-ASCII paths still match.
+PYTEST_FILE_PATTERN = re.compile(r"^([\w/]+\.py):(\d+):", re.MULTILINE)
+# Every pytest error line format in one alternation, so the log is scanned
+# in a single finditer pass. Each branch starts with a literal character,
+# which lets the regex engine skip quickly over text that cannot match; the
+# exception name before "Error:" is recovered with EXCEPTION_NAME_PATTERN
+# only when that branch matches.
+PYTEST_ERROR_PATTERN = re.compile(
+    r"E(?:(?<!\SE)[ \t]+(?P<e>\S.*)"     # Standard pytest error
+    r"|rror:[ \t]*(?P<err>\S.*))"        # Python errors, e.g. AssertionError:
+    r"|>(?<!\S>)[ \t]+(?P<code>\S.*)",   # Code line that failed
+    re.ASCII
+)
+EXCEPTION_NAME_PATTERN = re.compile(r"\w+$", re.ASCII)
+UNITTEST_FILE_PATTERN = re.compile(r'File "([^"]+)", line (\d+)', re.ASCII)
+UNITTEST_ERROR_PATTERNS = (
+    re.compile(r"AssertionError:\s*(.+)", re.ASCII),
+    re.compile(r"(\w+Error):\s*(.+)", re.ASCII)
+)
+GENERIC_TRACEBACK_PATTERN = re.compile(r'File "([^"]+)", line (\d+).*\n.*\n\s*(\w+Error.*)', re.MULTILINE | re.ASCII)
+PYTEST_SUMMARY_PATTERN = re.compile(r'=+ (\d+) failed.*?(\d+) passed.*?in ([\d.]+)s', re.ASCII)
+
+# Substrings of a lowercased log that suggest a flaky failure. Separate
+# substring scans beat a single case-insensitive regex alternation here:
+# CPython's re cannot skip ahead on an IGNORECASE alternation.
+FLAKY_INDICATORS = (
+    'timeout',
+    'connection',
+    'network',
+    'race condition',
+    'timing',
+    'random'
+)
+
+def read_log_tail(f: BinaryIO, max_bytes: int) -> Tuple[str, bool]:
+    """Read at most the last max_bytes of a binary file; also report whether that is all of it.
+    A partial first line is dropped so patterns anchored at line starts cannot match mid-line."""
+    size = f.seek(0, os.SEEK_END)
+    whole_file = size <= max_bytes
+    f.seek(max(0, size - max_bytes))
+    data = f.read()
+    if not whole_file:
+        data = data[data.find(b'\n') + 1:]
+    return data.decode('utf-8', 'replace'), whole_file
+
 class LogParser:
     """Enhanced log parser with support for multiple test frameworks and error types"""
-    
-    def __init__(self):
-        self.patterns = {
-            'pytest': {
-                'file_pattern': re.compile(r"^([\w/]+\.py):(\d+):", re.MULTILINE),
-                'error_patterns': [
-                    re.compile(r"E\s+(.+)"),  # Standard pytest error
-                    re.compile(r">\s+(.+)"),  # Code line that failed
-                    re.compile(r"AssertionError:\s*(.+)"),  # Assertion errors
-                    re.compile(r"(\w+Error):\s*(.+)")  # General Python errors
-                ]
-            },
-            'unittest': {
-                'file_pattern': re.compile(r'File "([^"]+)", line (\d+)'),
-                'error_patterns': [
-                    re.compile(r"AssertionError:\s*(.+)"),
-                    re.compile(r"(\w+Error):\s*(.+)")
-                ]
-            }
-        }
 
-    def parse_failure(self, log_content: str) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def parse_failure(log_content: str) -> Optional[Dict[str, Any]]:
         """
         Enhanced parsing that handles multiple test frameworks and error types.
         Returns a dict with 'file_path', 'error_message', 'line_number', and 'error_type'.
         """
         logger.info("Parsing log content for failures")
         
+        if not _ERROR_WORDS.search(log_content):
+            logger.warning("No error indicators found in logs")
+            return None
+        
         # Try pytest format first (most common)
-        error_info = self._parse_pytest_failure(log_content)
+        error_info = LogParser._parse_pytest_failure(log_content)
         if error_info:
             logger.info(f"Found pytest failure: {error_info}")
             return error_info
         
         # Try unittest format
-        error_info = self._parse_unittest_failure(log_content)
+        error_info = LogParser._parse_unittest_failure(log_content)
         if error_info:
             logger.info(f"Found unittest failure: {error_info}")
             return error_info
         
         # Try generic Python error format
-        error_info = self._parse_generic_failure(log_content)
+        error_info = LogParser._parse_generic_failure(log_content)
         if error_info:
             logger.info(f"Found generic failure: {error_info}")
             return error_info
@@ -55,12 +96,32 @@ class LogParser:
         logger.warning("No parseable error found in logs")
         return None
 
-    def _parse_pytest_failure(self, log_content: str) -> Optional[Dict[str, Any]]:
-        """Parse pytest-specific failure format"""
-        patterns = self.patterns['pytest']
+    @staticmethod
+    def parse_failure_stream(source: Union[str, os.PathLike, BinaryIO],
+                            tail_bytes: int = STREAM_TAIL_BYTES) -> Optional[Dict[str, Any]]:
+        """
+        Parse a log file (a path, or a seekable binary file object) from its end.
+        Only the last tail_bytes are read and parsed; the whole log is read only
+        when no failure is found in that window.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                return LogParser.parse_failure_stream(f, tail_bytes)
         
+        tail, whole_file = read_log_tail(source, tail_bytes)
+        error_info = LogParser.parse_failure(tail)
+        if error_info or whole_file:
+            return error_info
+        
+        logger.info("No failure in the log tail, parsing the whole log")
+        source.seek(0)
+        return LogParser.parse_failure(source.read().decode('utf-8', 'replace'))
+
+    @staticmethod
+    def _parse_pytest_failure(log_content: str) -> Optional[Dict[str, Any]]:
+        """Parse pytest-specific failure format"""
         # Find file and line number
-        file_match = patterns['file_pattern'].search(log_content)
+        file_match = PYTEST_FILE_PATTERN.search(log_content)
         if not file_match:
             return None
         
@@ -75,54 +136,61 @@ class LogParser:
             'framework': 'pytest'
         }
         
-        # Find the most relevant error message
-        lines = log_content.split('\n')
-        error_messages = []
-        
-        for line in lines:
-            for pattern in patterns['error_patterns']:
-                match = pattern.search(line.strip())
-                if match:
-                    if len(match.groups()) == 1:
-                        error_messages.append(match.group(1))
-                    else:
-                        error_messages.append(f"{match.group(1)}: {match.group(2)}")
-        
-        # Choose the most descriptive error message
-        if error_messages:
-            # Prefer assertion errors, then specific errors, then generic
-            assertion_errors = [msg for msg in error_messages if 'assert' in msg.lower()]
-            if assertion_errors:
-                error_info['error_message'] = assertion_errors[0]
-                error_info['error_type'] = 'assertion'
-            else:
-                error_info['error_message'] = error_messages[0]
+        # Find the most relevant error message: the first assertion message
+        # wins, so scanning stops there; otherwise the first error seen is used
+        first_message = None
+        assertion_message = None
+        
+        for match in PYTEST_ERROR_PATTERN.finditer(log_content):
+            kind = match.lastgroup
+            message = match.group(kind).rstrip()
+            if kind == 'err':
+                line_start = log_content.rfind('\n', 0, match.start()) + 1
+                name = EXCEPTION_NAME_PATTERN.search(log_content, line_start, match.start())
+                if not name:
+                    continue
+                exception = f"{name.group()}Error"
+                # An assertion's own text is used when it already says "assert"
+                if exception != 'AssertionError' or 'assert' not in message.lower():
+                    message = f"{exception}: {message}"
+            
+            if 'assert' in message.lower():
+                assertion_message = message
+                break
+            if first_message is None:
+                first_message = message
+        
+        # Prefer assertion errors, then specific errors, then generic
+        if assertion_message:
+            error_info['error_message'] = assertion_message
+            error_info['error_type'] = 'assertion'
+        elif first_message:
+            error_info['error_message'] = first_message
         else:
             error_info['error_message'] = "Test failure detected"
         
         return error_info
 
-    def _parse_unittest_failure(self, log_content: str) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _parse_unittest_failure(log_content: str) -> Optional[Dict[str, Any]]:
         """Parse unittest-specific failure format"""
-        patterns = self.patterns['unittest']
-        
-        file_match = patterns['file_pattern'].search(log_content)
+        file_match = UNITTEST_FILE_PATTERN.search(log_content)
         if not file_match:
             return None
         
         return {
             'file_path': file_match.group(1),
             'line_number': int(file_match.group(2)),
-            'error_message': self._extract_error_message(log_content, patterns['error_patterns']),
+            'error_message': LogParser._extract_error_message(log_content, UNITTEST_ERROR_PATTERNS),
             'error_type': 'unittest',
             'framework': 'unittest'
         }
 
-    def _parse_generic_failure(self, log_content: str) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _parse_generic_failure(log_content: str) -> Optional[Dict[str, Any]]:
         """Parse generic Python error format"""
         # Look for traceback information
-        traceback_pattern = re.compile(r'File "([^"]+)", line (\d+).*\n.*\n\s*(\w+Error.*)', re.MULTILINE)
-        match = traceback_pattern.search(log_content)
+        match = GENERIC_TRACEBACK_PATTERN.search(log_content)
         
         if match:
             return {
@@ -135,7 +203,8 @@ class LogParser:
         
         return None
 
-    def _extract_error_message(self, log_content: str, error_patterns: List[re.Pattern]) -> str:
+    @staticmethod
+    def _extract_error_message(log_content: str, error_patterns: List[re.Pattern]) -> str:
         """Extract the most relevant error message from log content"""
         for pattern in error_patterns:
             match = pattern.search(log_content)
@@ -146,7 +215,8 @@ class LogParser:
                     return f"{match.group(1)}: {match.group(2)}"
         return "Unknown error"
 
-    def extract_test_summary(self, log_content: str) -> Dict[str, Any]:
+    @staticmethod
+    def extract_test_summary(log_content: str) -> Dict[str, Any]:
         """Extract test execution summary"""
         summary = {
             'total_tests': 0,
@@ -157,7 +227,7 @@ class LogParser:
         }
         
         # Pytest summary pattern
-        pytest_summary = re.search(r'=+ (\d+) failed.*?(\d+) passed.*?in ([\d.]+)s', log_content)
+        pytest_summary = PYTEST_SUMMARY_PATTERN.search(log_content)
         if pytest_summary:
             summary['failed'] = int(pytest_summary.group(1))
             summary['passed'] = int(pytest_summary.group(2))
@@ -166,16 +236,11 @@ class LogParser:
         
         return summary
 
-    def is_flaky_test(self, log_content: str) -> bool:
+    @staticmethod
+    def is_flaky_test(log_content: str) -> bool:
         """Detect if this might be a flaky test failure"""
-        flaky_indicators = [
-            'timeout',
-            'connection',
-            'network',
-            'race condition',
-            'timing',
-            'random'
-        ]
-        
         log_lower = log_content.lower()
-        return any(indicator in log_lower for indicator in flaky_indicators)
+        return any(indicator in log_lower for indicator in FLAKY_INDICATORS)
+
+# LogParser holds no state, so one shared instance serves every caller
+DEFAULT_PARSER = LogParser()
@@ -8,6 +8,7 @@ import sys
 import time
 import subprocess
 import tempfile
+from collections import deque
 from pathlib import Path
 
 # Add project root to path
@@ -53,48 +54,49 @@ def test_demo_failing_case():
         f.write(failing_test_content)
         return f.name
 
-def run_failing_tests(test_file):
-    """Run tests and capture the failure"""
+# Lines of test output kept; the failure report is at the end of the output
+LOG_TAIL_LINES = 1000
+
+def run_failing_tests(test_file, save_log=False):
+    """Run tests and return their captured output"""
     print("🧪 Running tests to generate failure...")
     
     try:
-        result = subprocess.run(
+        # Stream the output and keep only its tail instead of buffering all of it
+        with subprocess.Popen(
             ['python', '-m', 'pytest', test_file, '-v'],
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
             cwd=project_root
-        )
+        ) as proc:
+            log_content = ''.join(deque(proc.stdout, maxlen=LOG_TAIL_LINES))
         
-        # Save output to log file
-        log_file = 'demo_test_output.log'
-        with open(log_file, 'w') as f:
-            f.write(result.stdout)
-            f.write(result.stderr)
+        if save_log:
+            log_file = 'demo_test_output.log'
+            with open(log_file, 'w') as f:
+                f.write(log_content)
+            print(f"📝 Test output saved to: {log_file}")
         
-        print(f"📝 Test output saved to: {log_file}")
         print("Test Output Preview:")
         print("-" * 40)
-        print(result.stdout[-500:])  # Show last 500 characters
+        print(log_content[-500:])  # Show last 500 characters
         print("-" * 40)
         
-        return log_file
+        return log_content
     
     except Exception as e:
         print(f"❌ Failed to run tests: {e}")
         return None
 
-def demonstrate_log_parsing(log_file):
+def demonstrate_log_parsing(log_content):
     """Demonstrate log parsing capabilities"""
     print("\n🔍 Demonstrating Log Parsing...")
     
     try:
-        from healer.log_parser import LogParser
-        
-        with open(log_file, 'r') as f:
-            log_content = f.read()
+        from healer.log_parser import DEFAULT_PARSER
         
-        parser = LogParser()
-        error_info = parser.parse_failure(log_content)
+        error_info = DEFAULT_PARSER.parse_failure(log_content)
         
         if error_info:
             print("✅ Log Parser Results:")
@@ -191,26 +193,20 @@ def cleanup_demo_files():
     """Clean up demo files"""
     print("\n🧹 Cleaning up demo files...")
     
-    files_to_remove = [
-        'demo_test_output.log',
-    ]
-    
-    for file_path in files_to_remove:
-        try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                print(f"   🗑️  Removed: {file_path}")
-        except Exception as e:
-            print(f"   ⚠️  Failed to remove {file_path}: {e}")
-    
-    # Remove any temporary test files
-    tests_dir = Path('tests')
-    for test_file in tests_dir.glob('tmp*.py'):
-        try:
-            test_file.unlink()
-            print(f"   🗑️  Removed: {test_file}")
-        except Exception as e:
-            print(f"   ⚠️  Failed to remove {test_file}: {e}")
+    # Remove any temporary test files; scandir entries carry their type, so
+    # only the tmp*.py matches are ever stat'ed or touched
+    with os.scandir('tests') as entries:
+        for entry in entries:
+            if not (entry.name.startswith('tmp') and entry.name.endswith('.py') and entry.is_file()):
+                continue
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                print(f"   ⚠️  Failed to remove {entry.path}: {e}")
+                continue
+            print(f"   🗑️  Removed: {entry.path}")
 
 def main():
     """Run the demo"""
@@ -224,14 +220,14 @@ def main():
         
         # Step 2: Run tests and capture failure
         print("\n🧪 Step 2: Running tests to capture failure...")
-        log_file = run_failing_tests(test_file)
+        log_content = run_failing_tests(test_file, save_log='--save-log' in sys.argv[1:])
         
-        if not log_file:
+        if not log_content:
             print("❌ Demo failed: Could not generate test failure")
             return 1
         
         # Step 3: Demonstrate log parsing
-        error_info = demonstrate_log_parsing(log_file)
+        error_info = demonstrate_log_parsing(log_content)
         
         # Step 4: Demonstrate AI analysis
         fixed_content = demonstrate_ai_analysis(error_info, test_file)
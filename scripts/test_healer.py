@@ -5,8 +5,8 @@ Test script for the AI Healer Agent
 
 import os
 import sys
-import tempfile
 import subprocess
+from importlib.util import find_spec
 from pathlib import Path
 
 # Add project root to path
@@ -14,7 +14,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 def create_test_log():
-    """Create a test log file with a failing test"""
+    """Build the log of a test run with a failing test"""
     test_log_content = """
 ============================= test session starts ==============================
 platform linux -- Python 3.11.0, pytest-7.4.3, pluggy-1.3.0
@@ -37,35 +37,22 @@ tests/test_main.py:12: AssertionError
 FAILED tests/test_main.py::test_failing_case - assert 4 == 5
 ========================= 1 failed, 2 passed in 0.10s ============================
 """
-    
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.log', delete=False) as f:
-        f.write(test_log_content.strip())
-        return f.name
+    return test_log_content.strip()
 
 def test_log_parser():
     """Test the log parser functionality"""
     print("🧪 Testing Log Parser...")
     
-    from healer.log_parser import LogParser
+    from healer.log_parser import DEFAULT_PARSER
     
-    log_file = create_test_log()
+    error_info = DEFAULT_PARSER.parse_failure(create_test_log())
     
-    try:
-        with open(log_file, 'r') as f:
-            log_content = f.read()
-        
-        parser = LogParser()
-        error_info = parser.parse_failure(log_content)
-        
-        if error_info:
-            print(f"✅ Log parser found error: {error_info}")
-            return True
-        else:
-            print("❌ Log parser failed to find error")
-            return False
-    
-    finally:
-        os.unlink(log_file)
+    if error_info:
+        print(f"✅ Log parser found error: {error_info}")
+        return True
+    else:
+        print("❌ Log parser failed to find error")
+        return False
 
 def test_config():
     """Test configuration loading"""
@@ -114,16 +101,15 @@ def test_dependencies():
         'pytest',
         'openai',
         'requests',
+        'httpx',
         'gitpython'
     ]
     
-    missing_packages = []
+    # Packages whose import name differs from the name pip installs
+    import_names = {'gitpython': 'git'}
     
-    for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
-            missing_packages.append(package)
+    # find_spec only locates each module; nothing is imported
+    missing_packages = [p for p in required_packages if find_spec(import_names.get(p, p)) is None]
     
     if missing_packages:
         print(f"❌ Missing packages: {', '.join(missing_packages)}")
@@ -168,22 +154,20 @@ def run_unit_tests():
     print("🧪 Running Unit Tests...")
     
     try:
-        result = subprocess.run(
+        # Echo the output as the tests run instead of buffering all of it
+        print("Test Output:")
+        with subprocess.Popen(
             ['python', '-m', 'pytest', 'tests/', '-v'],
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
             cwd=project_root
-        )
-        
-        print("Test Output:")
-        print(result.stdout)
-        
-        if result.stderr:
-            print("Test Errors:")
-            print(result.stderr)
+        ) as proc:
+            for line in proc.stdout:
+                print(line, end='')
         
         # We expect some tests to fail (by design)
-        if result.returncode != 0:
+        if proc.returncode != 0:
             print("⚠️  Some tests failed (this is expected for the demo)")
         else:
             print("✅ All tests passed")
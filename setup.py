@@ -3,38 +3,59 @@
 Setup script for AI-Driven Self-Healing CI/CD Platform
 """
 
+import io
 import os
 import sys
-import subprocess
-import shutil
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
-def run_command(cmd, description=""):
-    """Run a command and handle errors"""
+# Tools that must be on PATH before setup can run
+PREREQUISITES = ['python3', 'pip', 'git', 'docker', 'docker-compose']
+
+# The venv's own interpreter; running it directly needs no activate script
+VENV_PYTHON = Path('venv') / ('Scripts' if os.name == 'nt' else 'bin') / ('python.exe' if os.name == 'nt' else 'python')
+
+# Project-local pip cache, so wheels built on one run are reused by the next
+# (and can be kept between CI runs), and an optional directory of prebuilt
+# wheels that pip checks before going to the network
+PIP_CACHE_DIR = Path('.pip-cache')
+WHEELHOUSE = Path('.wheelhouse')
+
+# Tests run by run_tests to check the installed environment works
+SMOKE_TESTS = ['tests/test_main.py::test_add', 'tests/test_main.py::test_main_endpoint']
+
+def run_command(cmd, description="", env=None):
+    """Run an argv list and handle errors"""
+    import subprocess  # deferred, like shutil: runs that exit early never need them
+    
     print(f"🔧 {description}")
     try:
-        result = subprocess.run(cmd, shell=True, check=True, capture_output=True, text=True)
+        result = subprocess.run(cmd, check=True, capture_output=True, text=True, env=env)
         print(f"✅ {description} completed")
         return result.stdout
     except subprocess.CalledProcessError as e:
         print(f"❌ {description} failed: {e.stderr}")
         return None
+    except OSError as e:
+        # Raised instead of CalledProcessError when the program isn't installed
+        print(f"❌ {description} failed: {e}")
+        return None
 
 def check_prerequisites():
     """Check if required tools are installed"""
-    print("🔍 Checking prerequisites...")
+    import shutil
     
-    prerequisites = {
-        'python3': 'python3 --version',
-        'pip': 'pip --version',
-        'git': 'git --version',
-        'docker': 'docker --version',
-        'docker-compose': 'docker-compose --version'
-    }
+    print("🔍 Checking prerequisites...")
     
+    # Only existence matters here, and a PATH lookup answers that without
+    # spawning a process per tool
     missing = []
-    for tool, cmd in prerequisites.items():
-        if not run_command(cmd, f"Checking {tool}"):
+    for tool in PREREQUISITES:
+        if shutil.which(tool):
+            print(f"✅ Found {tool}")
+        else:
+            print(f"❌ {tool} not found")
             missing.append(tool)
     
     if missing:
@@ -51,26 +72,36 @@ def setup_environment():
     
     # Create virtual environment if it doesn't exist
     if not Path('venv').exists():
-        if not run_command('python3 -m venv venv', "Creating virtual environment"):
+        if not run_command(['python3', '-m', 'venv', 'venv'], "Creating virtual environment"):
             return False
     
-    # Activate virtual environment and install dependencies
-    activate_cmd = 'source venv/bin/activate' if os.name != 'nt' else 'venv\\Scripts\\activate'
-    install_cmd = f'{activate_cmd} && pip install --upgrade pip && pip install -r requirements.txt'
+    # One pip run upgrades pip, installs wheel so sdists are cached as built
+    # wheels, and installs the requirements; repeat runs hit the wheel cache
+    install_cmd = [str(VENV_PYTHON), '-m', 'pip', 'install', '--upgrade', '--prefer-binary',
+                   'pip', 'wheel', '-r', 'requirements.txt']
+    if WHEELHOUSE.is_dir():
+        install_cmd.append(f'--find-links={WHEELHOUSE}')
+    env = dict(os.environ, PIP_CACHE_DIR=str(PIP_CACHE_DIR.resolve()))
     
-    if not run_command(install_cmd, "Installing Python dependencies"):
+    if not run_command(install_cmd, "Installing Python dependencies", env=env):
         return False
     
     return True
 
 def setup_configuration():
     """Setup configuration files"""
+    import shutil
+    
     print("⚙️  Setting up configuration...")
     
-    # Copy .env.example to .env if it doesn't exist
-    if not Path('.env').exists():
-        if Path('.env.example').exists():
-            shutil.copy('.env.example', '.env')
+    # Copy .env.example to .env if it doesn't exist; one directory listing
+    # answers both existence checks
+    with os.scandir('.') as it:
+        entries = {entry.name for entry in it}
+    
+    if '.env' not in entries:
+        if '.env.example' in entries:
+            shutil.copyfile('.env.example', '.env')
             print("📝 Created .env file from template")
             print("⚠️  Please edit .env file with your API keys and configuration")
         else:
@@ -97,30 +128,44 @@ def setup_git_hooks():
 
 echo "🔍 Running pre-commit checks..."
 
-# Run tests
-python -m pytest tests/ -v
-if [ $? -ne 0 ]; then
-    echo "❌ Tests failed. Commit aborted."
-    exit 1
+# Run tests and linting (if available) in parallel
+python -m pytest tests/ -q -x -p no:cacheprovider &
+tests_pid=$!
+if command -v flake8 &> /dev/null; then
+    flake8 app/ healer/ tests/ &
+    lint_pid=$!
 fi
 
-# Run linting (if available)
-if command -v flake8 &> /dev/null; then
-    flake8 app/ healer/ tests/
-    if [ $? -ne 0 ]; then
-        echo "❌ Linting failed. Commit aborted."
-        exit 1
-    fi
+wait $tests_pid
+tests_status=$?
+lint_status=0
+if [ -n "$lint_pid" ]; then
+    wait $lint_pid
+    lint_status=$?
+fi
+
+if [ $tests_status -ne 0 ]; then
+    echo "❌ Tests failed. Commit aborted."
+fi
+if [ $lint_status -ne 0 ]; then
+    echo "❌ Linting failed. Commit aborted."
+fi
+if [ $tests_status -ne 0 ] || [ $lint_status -ne 0 ]; then
+    exit 1
 fi
 
 echo "✅ Pre-commit checks passed"
 '''
     
-    with open(pre_commit_hook, 'w') as f:
-        f.write(pre_commit_content)
-    
-    # Make hook executable
-    os.chmod(pre_commit_hook, 0o755)
+    # Create the hook executable rather than chmod'ing it after the write;
+    # fchmod also covers a hook left by an earlier run with another mode
+    fd = os.open(pre_commit_hook, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o755)
+    try:
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, 0o755)
+        os.write(fd, pre_commit_content.encode())
+    finally:
+        os.close(fd)
     print("✅ Git hooks setup completed")
     
     return True
@@ -129,14 +174,82 @@ def run_tests():
     """Run tests to verify setup"""
     print("🧪 Running tests to verify setup...")
     
-    activate_cmd = 'source venv/bin/activate' if os.name != 'nt' else 'venv\\Scripts\\activate'
-    test_cmd = f'{activate_cmd} && python -m pytest tests/ -v'
+    # A smoke check is enough here: run two known tests by node ID rather
+    # than collecting the whole suite, without third-party plugins or the cache
+    test_cmd = [str(VENV_PYTHON), '-m', 'pytest', '-q', '-p', 'no:cacheprovider', '-o', 'addopts=',
+                *SMOKE_TESTS]
+    env = dict(os.environ, PYTEST_DISABLE_PLUGIN_AUTOLOAD='1')
     
-    result = run_command(test_cmd, "Running tests")
+    result = run_command(test_cmd, "Running tests", env=env)
     if result is None:
-        print("⚠️  Some tests failed, but this is expected for the demo")
-        return True  # Tests are expected to fail for demo purposes
+        # The smoke tests leave out the demo's intentionally failing test,
+        # so a failure here means the environment is broken
+        print("❌ Smoke tests failed; check the installed dependencies")
+        return False
+    
+    return True
+
+# Setup steps by key: (name, function, keys of the steps it needs first).
+# Configuration and git hooks only need the prerequisites, so they run
+# while the environment is still installing.
+SETUP_STEPS = {
+    'prereq': ("Prerequisites Check", check_prerequisites, []),
+    'env': ("Environment Setup", setup_environment, ['prereq']),
+    'config': ("Configuration Setup", setup_configuration, ['prereq']),
+    'hooks': ("Git Hooks Setup", setup_git_hooks, ['prereq']),
+    'tests': ("Test Verification", run_tests, ['env'])
+}
+
+class StepOutput:
+    """Stand-in for sys.stdout that sends each step thread's prints to
+    that step's own buffer, so concurrent steps don't interleave"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
     
+    def write(self, text):
+        return getattr(self.local, 'buffer', self.stream).write(text)
+    
+    def flush(self):
+        getattr(self.local, 'buffer', self.stream).flush()
+    
+    def run(self, step_func):
+        """Run a step in this thread, returning its result and its output"""
+        self.local.buffer = io.StringIO()
+        try:
+            return step_func(), self.local.buffer.getvalue()
+        finally:
+            del self.local.buffer
+
+def run_steps(steps):
+    """Run each step as soon as the steps it depends on have succeeded.
+    Stops starting new steps at the first failure. Each step's output is
+    printed under its header once the step finishes."""
+    done = set()
+    running = {}
+    output = StepOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=len(steps)) as executor:
+            while len(done) < len(steps):
+                for key, (step_name, step_func, deps) in steps.items():
+                    if key not in done and key not in running.values() and all(d in done for d in deps):
+                        running[executor.submit(output.run, step_func)] = key
+                
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    key = running.pop(future)
+                    succeeded, step_output = future.result()
+                    print(f"\n📋 Step: {steps[key][0]}")
+                    print(step_output, end='')
+                    if not succeeded:
+                        print(f"❌ Setup failed at: {steps[key][0]}")
+                        executor.shutdown(cancel_futures=True)
+                        return False
+                    done.add(key)
+    finally:
+        sys.stdout = output.stream
     return True
 
 def main():
@@ -144,19 +257,8 @@ def main():
     print("🚀 AI-Driven Self-Healing CI/CD Platform Setup")
     print("=" * 50)
     
-    steps = [
-        ("Prerequisites Check", check_prerequisites),
-        ("Environment Setup", setup_environment),
-        ("Configuration Setup", setup_configuration),
-        ("Git Hooks Setup", setup_git_hooks),
-        ("Test Verification", run_tests)
-    ]
-    
-    for step_name, step_func in steps:
-        print(f"\n📋 Step: {step_name}")
-        if not step_func():
-            print(f"❌ Setup failed at: {step_name}")
-            sys.exit(1)
+    if not run_steps(SETUP_STEPS):
+        sys.exit(1)
     
     print("\n🎉 Setup completed successfully!")
     print("\n📝 Next steps:")
@@ -0,0 +1,6 @@
+import os
+
+# healer.config checks these are set when it is imported; the tests never
+# send anything to OpenAI or GitHub
+for name in ('OPENAI_API_KEY', 'GITHUB_TOKEN', 'GITHUB_REPOSITORY'):
+    os.environ.setdefault(name, 'test')
@@ -0,0 +1,45 @@
+import pytest
+from healer.cache import FixCache
+from healer.config import config
+from healer.llm_client import LLMClient
+
+@pytest.fixture
+def cache():
+    """In-memory fix cache"""
+    fix_cache = FixCache(':memory:', ttl=3600)
+    yield fix_cache
+    fix_cache.close()
+
+def test_exact_hit_and_miss(cache):
+    """A stored fix is returned for its key only"""
+    key = FixCache.make_key('gpt-4', 'prompt', 'file')
+    cache.put(key, 'fixed code')
+
+    assert cache.get(key) == 'fixed code'
+    assert cache.get(FixCache.make_key('gpt-4', 'other prompt', 'file')) is None
+    assert cache.stats() == {'hits': 1, 'semantic_hits': 0, 'misses': 1, 'entries': 1}
+
+def test_expired_entry_is_a_miss():
+    """Entries older than the TTL are not returned"""
+    fix_cache = FixCache(':memory:', ttl=-1)
+    key = FixCache.make_key('key')
+    fix_cache.put(key, 'fixed code')
+
+    assert fix_cache.get(key) is None
+    fix_cache.close()
+
+def test_semantic_hit(cache):
+    """A close embedding for the same file returns the stored fix"""
+    file_hash = FixCache.make_key('gpt-4', 'tests/test_main.py', 'content')
+    cache.put(FixCache.make_key('first'), 'fixed code', file_hash, [1.0, 0.0, 0.1])
+
+    assert cache.get_similar(file_hash, [1.0, 0.0, 0.12]) == 'fixed code'
+    assert cache.get_similar(file_hash, [0.0, 1.0, 0.0]) is None
+    assert cache.get_similar(FixCache.make_key('other file'), [1.0, 0.0, 0.1]) is None
+    assert cache.stats()['semantic_hits'] == 1
+
+@pytest.mark.parametrize("path", ['/proc/nonexistent/llm_cache.db', '/dev/null/llm_cache.db'])
+def test_unusable_path_disables_cache(monkeypatch, path):
+    """An unwritable cache location turns the cache off instead of failing"""
+    monkeypatch.setattr(config, 'llm_cache_path', path)
+    assert LLMClient()._cache is None
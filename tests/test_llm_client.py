@@ -0,0 +1,177 @@
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+from healer.config import config
+from healer.llm_client import FIX_CONTEXT_LINES, LLMClient, TruncatedReplyError
+
+@pytest.fixture
+def llm_client(monkeypatch):
+    """LLM client without a response cache; no request is ever sent"""
+    monkeypatch.setattr(config, 'llm_cache_path', '')
+    return LLMClient()
+
+class FakeStream:
+    """Streamed completion that yields the content a line per chunk"""
+
+    def __init__(self, content, finish_reason):
+        self.events = [self._event(line) for line in content.splitlines(keepends=True)]
+        self.events.append(self._event(None, finish_reason))
+        self.closed = False
+        self.response = SimpleNamespace(aclose=self.aclose)
+
+    @staticmethod
+    def _event(content, finish_reason=None):
+        choice = SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)
+        return SimpleNamespace(choices=[choice])
+
+    async def aclose(self):
+        self.closed = True
+
+    async def __aiter__(self):
+        for event in self.events:
+            if self.closed:
+                return
+            yield event
+
+class FakeOpenAI:
+    """Stands in for AsyncOpenAI; every create() call is answered by reply(kwargs)"""
+
+    def __init__(self, reply, finish_reason='stop'):
+        self.reply = reply
+        self.finish_reason = finish_reason
+        self.calls = []
+        self.streams = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def with_options(self, **kwargs):
+        return self
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        content = self.reply(kwargs)
+        if kwargs.get('stream'):
+            self.streams.append(FakeStream(content, self.finish_reason))
+            return self.streams[-1]
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason=self.finish_reason)])
+
+def make_file(total_lines, line_length=10):
+    return ''.join(f"x{i} = {'1' * line_length}\n" for i in range(total_lines))
+
+def test_excerpt_splice_round_trip(llm_client):
+    """Splicing back an unchanged excerpt restores the original file"""
+    file_content = make_file(1000)
+    lines, start, end, prompt = llm_client._windowed_prompt(file_content, {'line_number': 500})
+
+    assert (start, end) == (499 - FIX_CONTEXT_LINES, 500 + FIX_CONTEXT_LINES)
+    assert f"EXCERPT: lines {start + 1}-{end} of 1000" in prompt
+
+    excerpt = llm_client._clean_response(''.join(lines[start:end]))
+    assert llm_client._splice_fix(lines, start, end, excerpt) == file_content
+
+def test_excerpt_splice_replaces_only_the_window(llm_client):
+    """A fixed excerpt replaces its lines and nothing else"""
+    file_content = make_file(1000)
+    lines, start, end, _ = llm_client._windowed_prompt(file_content, {'line_number': 500})
+
+    fixed = ''.join(lines[start:end]).replace('x499 =', 'y499 =')
+    spliced = llm_client._splice_fix(lines, start, end, llm_client._clean_response(fixed))
+    assert spliced == file_content.replace('x499 =', 'y499 =')
+
+@pytest.mark.parametrize("line_number", [None, 'Unknown', 0, 5000])
+def test_whole_file_without_usable_line(llm_client, line_number):
+    """The whole file is sent when the failing line is unknown or out of range"""
+    lines = make_file(1000).splitlines(keepends=True)
+    assert llm_client._fix_window(lines, line_number) == (0, 1000)
+
+def test_window_narrows_to_token_budget(llm_client):
+    """Long lines shrink the window around the failing line until it fits"""
+    lines = make_file(1000, line_length=200).splitlines(keepends=True)
+    start, end = llm_client._fix_window(lines, 500)
+
+    assert start <= 499 < end
+    assert end - start < 2 * FIX_CONTEXT_LINES + 1
+
+def test_truncated_reply_is_not_retried(llm_client):
+    """A reply cut off at max_tokens raises instead of being spliced in, once"""
+    file_content = make_file(1000)
+    lines, start, end, _ = llm_client._windowed_prompt(file_content, {'line_number': 500})
+    excerpt = ''.join(lines[start:end])
+    llm_client._client = FakeOpenAI(lambda kwargs: excerpt[:len(excerpt) // 2], finish_reason='length')
+
+    with pytest.raises(TruncatedReplyError):
+        asyncio.run(llm_client.get_fix(file_content, {'line_number': 500}))
+    assert len(llm_client._client.calls) == 1
+
+def test_oversized_whole_file_fails_before_the_api(llm_client):
+    """A whole file too big to echo back is rejected without a request"""
+    llm_client._client = FakeOpenAI(lambda kwargs: pytest.fail("request sent"))
+    with pytest.raises(ValueError, match="too large"):
+        asyncio.run(llm_client.get_fix(make_file(1000, line_length=200), {}))
+
+def stream_reply(llm_client, reply, sent_first_line=''):
+    llm_client._client = FakeOpenAI(lambda kwargs: reply)
+    return asyncio.run(llm_client._stream_completion(model=llm_client.model, messages=[],
+                                                     sent_first_line=sent_first_line))
+
+def test_prose_reply_is_abandoned(llm_client):
+    """A reply opening with prose is closed without reading the rest"""
+    with pytest.raises(ValueError, match="prose"):
+        stream_reply(llm_client, "I'm sorry, I can't fix this.\nIt needs more context.\n")
+    assert llm_client._client.streams[0].closed
+
+@pytest.mark.parametrize("reply,sent_first_line", [
+    # The excerpt sent started inside a docstring
+    ("    I am line 97 of a long docstring.\n    More of it.\n", "I am line 97 of a long docstring."),
+    # Code that happens to start like an opener
+    ("I = 5\nJ = I + 1\n", ""),
+])
+def test_code_reply_is_kept(llm_client, reply, sent_first_line):
+    """Replies echoing the code sent, or plain code, are not taken for prose"""
+    assert stream_reply(llm_client, reply, sent_first_line) == reply
+
+def batch_reply(contents):
+    """Reply to a batched request with the given {item id: fixed content}"""
+    return json.dumps({'fixes': [{'id': item_id, 'content': content} for item_id, content in contents.items()]})
+
+def test_pack_batches_by_count_and_tokens(llm_client):
+    """Batches hold at most batch_size items whose excerpts fit the budget together"""
+    small = (make_file(5), {'line_number': 1})
+    big = (make_file(1000, line_length=30), {'line_number': 500})
+    items = [small, small, big, small, small, small, small, small, big, big]
+
+    assert llm_client._pack_batches(items, list(range(len(items))), 4) == [
+        [0, 1, 2, 3], [4, 5, 6, 7], [8], [9]
+    ]
+
+def test_batched_fixes_fall_back_per_item(llm_client):
+    """Items the batched reply leaves out are fixed with their own request"""
+    items = [(make_file(5), {'line_number': 1}) for _ in range(3)]
+
+    def reply(kwargs):
+        if kwargs.get('stream'):
+            return "alone\nfixed\n"
+        return batch_reply({0: "first\nfixed\n", 2: "third\nfixed\n"})
+
+    llm_client._client = FakeOpenAI(reply)
+    results = asyncio.run(llm_client.get_fixes_batched(items))
+
+    assert results == ["first\nfixed", "alone\nfixed", "third\nfixed"]
+    assert [bool(call.get('stream')) for call in llm_client._client.calls] == [False, True]
+
+def test_failed_item_does_not_discard_other_fixes(llm_client):
+    """An item that cannot be fixed gets None; the rest are still returned"""
+    items = [(make_file(5), {'line_number': 1}), (make_file(5), {'line_number': 1}),
+             (make_file(1000, line_length=200), {})]
+    llm_client._client = FakeOpenAI(lambda kwargs: batch_reply({0: "a\nb\n", 1: "c\nd\n"}))
+
+    assert asyncio.run(llm_client.get_fixes_batched(items)) == ["a\nb", "c\nd", None]
+
+def test_run_many_keeps_other_fixes_on_failure(llm_client):
+    """A failing request gets None without discarding the other fixes"""
+    requests = [(make_file(5), {'line_number': 1}), (make_file(1000, line_length=200), {}),
+                (make_file(5), {'line_number': 1})]
+    llm_client._client = FakeOpenAI(lambda kwargs: "fixed\ncode\n")
+
+    assert asyncio.run(llm_client.run_many(requests)) == ["fixed\ncode", None, "fixed\ncode"]
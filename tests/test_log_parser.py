@@ -0,0 +1,129 @@
+import io
+import pytest
+from healer.log_parser import DEFAULT_PARSER, LogParser, read_log_tail
+
+PYTEST_ASSERTION_LOG = """
+============================= test session starts ==============================
+collected 8 items
+
+tests/test_main.py ......F.                                              [100%]
+
+=================================== FAILURES ===================================
+______________________________ test_failing_case _______________________________
+
+    def test_failing_case():
+        \"\"\"This test is designed to fail to trigger the self-healing agent\"\"\"
+>       assert add(2, 2) == 5
+E       assert 4 == 5
+E        +  where 4 = add(2, 2)
+
+tests/test_main.py:67: AssertionError
+=========================== short test summary info ============================
+FAILED tests/test_main.py::test_failing_case - assert 4 == 5
+========================= 1 failed, 7 passed in 0.13s ==========================
+"""
+
+UNITTEST_LOG = """F
+======================================================================
+FAIL: test_x (test_mod.T)
+----------------------------------------------------------------------
+Traceback (most recent call last):
+  File "/w/tests/test_mod.py", line 7, in test_x
+    self.assertEqual(1, 2)
+AssertionError: 1 != 2
+"""
+
+GENERIC_LOG = """Traceback (most recent call last):
+  File "app/x.py", line 3, in <module>
+    foo()
+NameError: name 'foo' is not defined"""
+
+def test_pytest_assertion():
+    """The failing assert is reported with the file and line pytest names"""
+    error_info = DEFAULT_PARSER.parse_failure(PYTEST_ASSERTION_LOG)
+    assert error_info == {
+        'file_path': 'tests/test_main.py',
+        'line_number': 67,
+        'error_type': 'assertion',
+        'framework': 'pytest',
+        'error_message': 'assert add(2, 2) == 5'
+    }
+
+@pytest.mark.parametrize("log,expected", [
+    # Code line marked ">" comes before the "E" line
+    ("tests/test_calc.py:12: in test_divide\n"
+     ">       result = divide(1, 0)\n"
+     "E       ZeroDivisionError: division by zero\n",
+     "result = divide(1, 0)"),
+    # "E" line on its own
+    ("tests/test_calc.py:12: in test_divide\n"
+     "E       ZeroDivisionError: division by zero\n",
+     "ZeroDivisionError: division by zero"),
+    # Bare "XError:" line
+    ("tests/test_a.py:5: in test_a\n"
+     "ValueError: bad value\n",
+     "ValueError: bad value"),
+    # A word ending in "E" is not pytest's "E" marker
+    ("tests/test_a.py:5: in test_a\n"
+     "FILE  missing\n"
+     "KeyError: 'x'\n",
+     "KeyError: 'x'"),
+    # Neither is a ">" inside an expression
+    ("tests/test_a.py:5: in test_a\n"
+     "if a>  b\n"
+     "KeyError: 'x'\n",
+     "KeyError: 'x'"),
+])
+def test_pytest_error_message(log, expected):
+    """Each pytest error line format yields the expected message"""
+    error_info = DEFAULT_PARSER.parse_failure(log)
+    assert error_info['error_type'] == 'pytest'
+    assert error_info['error_message'] == expected
+
+def test_pytest_named_assertion_error():
+    """An AssertionError line is reported as an assertion"""
+    error_info = DEFAULT_PARSER.parse_failure("tests/test_a.py:5: in test_a\nAssertionError: values differ\n")
+    assert error_info['error_type'] == 'assertion'
+    assert error_info['error_message'] == 'AssertionError: values differ'
+
+def test_unittest_failure():
+    """unittest tracebacks are parsed when there is no pytest location"""
+    error_info = DEFAULT_PARSER.parse_failure(UNITTEST_LOG)
+    assert error_info == {
+        'file_path': '/w/tests/test_mod.py',
+        'line_number': 7,
+        'error_message': '1 != 2',
+        'error_type': 'unittest',
+        'framework': 'unittest'
+    }
+
+def test_generic_failure():
+    """A plain traceback is parsed by the unittest rules first"""
+    error_info = DEFAULT_PARSER.parse_failure(GENERIC_LOG)
+    assert error_info['file_path'] == 'app/x.py'
+    assert error_info['line_number'] == 3
+    assert error_info['error_message'] == "NameError: name 'foo' is not defined"
+
+def test_clean_log():
+    """Logs without failures parse to None"""
+    assert DEFAULT_PARSER.parse_failure("all good\n" * 100) is None
+
+def test_test_summary():
+    """The pytest summary line gives the pass/fail counts"""
+    summary = LogParser.extract_test_summary(PYTEST_ASSERTION_LOG)
+    assert summary['failed'] == 1
+    assert summary['passed'] == 7
+    assert summary['total_tests'] == 8
+
+def test_read_log_tail_drops_partial_line():
+    """Only whole lines of the tail are returned"""
+    content, whole_file = read_log_tail(io.BytesIO(b"first line\nsecond line\n"), 15)
+    assert content == "second line\n"
+    assert not whole_file
+
+def test_parse_failure_stream_falls_back_to_whole_log():
+    """A failure before the tail window is still found"""
+    log = PYTEST_ASSERTION_LOG.encode() + b"noise line\n" * 1000
+    error_info = LogParser.parse_failure_stream(io.BytesIO(log), tail_bytes=1024)
+    assert error_info['file_path'] == 'tests/test_main.py'
+    assert error_info['line_number'] == 67